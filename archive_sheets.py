@@ -0,0 +1,69 @@
+import gspread
+import os
+import pandas as pd
+
+from archive_store import DATE_COLUMNS, select_rows_to_archive, write_partitions
+from search_index import index_records
+from shared_cache import invalidate
+from sheet_versions import bump_version
+
+print("Archiving old rows to local Parquet partitions...")
+
+if not os.path.exists('service_account.json'):
+    print("ERROR: service_account.json not found!")
+    exit()
+
+def contiguous_runs(row_numbers):
+    """Groups sorted sheet row numbers into (start, end) runs, last run first."""
+    runs = []
+    for row in sorted(row_numbers):
+        if runs and runs[-1][1] == row - 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return list(reversed(runs))
+
+try:
+    gc = gspread.service_account(filename='service_account.json')
+    try:
+        sh = gc.open("database_sirumat")
+    except gspread.SpreadsheetNotFound:
+        sh = gc.open("Database_SiRumat")
+
+    print(f"Connected to: {sh.title}")
+
+    for sheet_name in DATE_COLUMNS:
+        try:
+            ws = sh.worksheet(sheet_name)
+            df = pd.DataFrame(ws.get_all_records())
+            if df.empty:
+                print(f"{sheet_name}: empty, skipped.")
+                continue
+
+            mask = select_rows_to_archive(sheet_name, df)
+            if not mask.any():
+                print(f"{sheet_name}: nothing to archive.")
+                continue
+
+            # Write the cold tier first; rows are only deleted once they are safely on disk
+            written = write_partitions(sheet_name, df[mask])
+            print(f"{sheet_name}: {written} rows written to Parquet.")
+            # The history views page through the search index, which must keep archived rows
+            index_records(sheet_name, df[mask].to_dict("records"), archived=True)
+
+            # Data row i (0-based) lives on sheet row i + 2 (row 1 is the header).
+            # Delete bottom-up so earlier row numbers stay valid.
+            for start, end in contiguous_runs(int(i) + 2 for i in df.index[mask.to_numpy()]):
+                ws.delete_rows(start, end)
+            invalidate(sheet_name)
+            bump_version(sh, sheet_name)
+            print(f"{sheet_name}: {written} rows removed from the worksheet.")
+        except gspread.WorksheetNotFound:
+            print(f"{sheet_name}: worksheet not found, skipped.")
+        except Exception as e:
+            print(f"Error archiving {sheet_name}: {e}")
+
+    print("Archiving Complete!")
+
+except Exception as e:
+    print(f"CRITICAL ERROR: {e}")
@@ -0,0 +1,103 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+
+# Cold tier: one Parquet file per worksheet per month, e.g. arsip_data/Presensi_PPNPN/2025-10.parquet
+ARCHIVE_DIR = "arsip_data"
+
+# Column holding the row timestamp (YYYY-MM-DD HH:MM:SS) in each archivable worksheet
+DATE_COLUMNS = {
+    "Laporan_Kerusakan": "Tanggal",
+    "Laporan_Perbaikan": "Tanggal",
+    "Presensi_PPNPN": "Waktu",
+}
+
+def partition_path(sheet_name, month):
+    return os.path.join(ARCHIVE_DIR, sheet_name, f"{month}.parquet")
+
+def list_partitions(sheet_name, start=None, end=None):
+    """Returns the archived months (YYYY-MM) of a sheet overlapping the date range."""
+    folder = os.path.join(ARCHIVE_DIR, sheet_name)
+    if not os.path.isdir(folder):
+        return []
+
+    months = sorted(f[:-len(".parquet")] for f in os.listdir(folder) if f.endswith(".parquet"))
+    if start:
+        months = [m for m in months if m >= str(start)[:7]]
+    if end:
+        months = [m for m in months if m <= str(end)[:7]]
+    return months
+
+def select_rows_to_archive(sheet_name, df, now=None):
+    """Returns a boolean mask of the rows that should leave the hot worksheet.
+
+    Rows from past months are archived. For Laporan_Kerusakan only closed
+    tickets move, so pending ones stay selectable in the repair form.
+    """
+    current_month = (now or datetime.now()).strftime("%Y-%m")
+    months = df[DATE_COLUMNS[sheet_name]].astype(str).str[:7]
+    # Skip rows without a proper date (e.g. debug rows) so they are never lost
+    mask = months.str.match(r"^\d{4}-\d{2}$") & (months < current_month)
+    if sheet_name == "Laporan_Kerusakan" and "Status" in df.columns:
+        mask &= df["Status"] == "Selesai"
+    return mask
+
+def write_partitions(sheet_name, df):
+    """Merges rows into their month partitions. Returns the number of rows written."""
+    if df.empty:
+        return 0
+
+    date_col = DATE_COLUMNS[sheet_name]
+    # Sheets values come back as mixed int/str; store everything as text for a stable schema
+    df = df.astype(str)
+    os.makedirs(os.path.join(ARCHIVE_DIR, sheet_name), exist_ok=True)
+
+    for month, part in df.groupby(df[date_col].str[:7]):
+        path = partition_path(sheet_name, month)
+        if os.path.exists(path):
+            # Re-running the job after a failed delete must not duplicate rows
+            part = pd.concat([pd.read_parquet(path), part], ignore_index=True).drop_duplicates()
+        part = part.sort_values(date_col)
+
+        tmp_path = path + ".tmp"
+        part.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return len(df)
+
+def _date_filters(date_col, start, end):
+    filters = []
+    if start:
+        filters.append((date_col, ">=", str(start)))
+    if end:
+        # Dates are compared as text, so include the whole end day
+        filters.append((date_col, "<=", f"{end} 23:59:59"))
+    return filters or None
+
+def read_archive(sheet_name, start=None, end=None, columns=None):
+    """Reads archived rows of a sheet, pruning by month partition and filtering on date."""
+    import pyarrow.parquet as pq
+
+    date_col = DATE_COLUMNS.get(sheet_name)
+    if date_col is None:
+        return pd.DataFrame()
+
+    frames = []
+    for month in list_partitions(sheet_name, start, end):
+        path = partition_path(sheet_name, month)
+        available = pq.read_schema(path).names
+        wanted = [c for c in columns if c in available] if columns else None
+        frames.append(pd.read_parquet(path, columns=wanted, filters=_date_filters(date_col, start, end)))
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def count_archived(sheet_name):
+    """Counts archived rows from Parquet footers without reading any data."""
+    import pyarrow.parquet as pq
+
+    return sum(
+        pq.ParquetFile(partition_path(sheet_name, month)).metadata.num_rows
+        for month in list_partitions(sheet_name)
+    )
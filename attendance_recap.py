@@ -0,0 +1,177 @@
+import pandas as pd
+
+from local_store import connect, get_setting, set_setting, write_transaction
+
+STATUSES = ("Hadir", "Izin", "Sakit")
+
+# Set once the archived attendance was applied (fresh installs backfill from the archive once)
+BACKFILL_KEY = "rekap_presensi_arsip_terisi"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS presensi_harian (
+    nama TEXT NOT NULL,
+    tanggal TEXT NOT NULL,
+    status TEXT NOT NULL,
+    waktu TEXT NOT NULL,
+    arsip INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (nama, tanggal)
+);
+CREATE TABLE IF NOT EXISTS rekap_bulanan (
+    nama TEXT NOT NULL,
+    bulan TEXT NOT NULL,
+    hadir INTEGER NOT NULL DEFAULT 0,
+    izin INTEGER NOT NULL DEFAULT 0,
+    sakit INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (nama, bulan)
+);
+"""
+
+def open_recap():
+    # Autocommit: every update runs in its own write_transaction()
+    conn = connect(autocommit=True)
+    conn.executescript(SCHEMA)
+    return conn
+
+def _bump(conn, nama, bulan, status, delta):
+    if status not in STATUSES:
+        return
+    col = status.lower()
+    conn.execute(
+        f"INSERT INTO rekap_bulanan (nama, bulan, {col}) VALUES (?, ?, ?) "
+        f"ON CONFLICT (nama, bulan) DO UPDATE SET {col} = {col} + excluded.{col}",
+        (nama, bulan, delta)
+    )
+
+def _set_day(conn, nama, tanggal, old_status, status, waktu, arsip=0):
+    """Records a day's status and moves it from the old counter (None: new day) to the new one."""
+    if old_status is not None:
+        _bump(conn, nama, tanggal[:7], old_status, -1)
+    conn.execute(
+        "INSERT INTO presensi_harian (nama, tanggal, status, waktu, arsip) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (nama, tanggal) DO UPDATE SET status = excluded.status, waktu = excluded.waktu, "
+        "arsip = excluded.arsip",
+        (nama, tanggal, status, waktu, arsip)
+    )
+    _bump(conn, nama, tanggal[:7], status, 1)
+
+def _retract_day(conn, nama, tanggal, status):
+    _bump(conn, nama, tanggal[:7], status, -1)
+    conn.execute("DELETE FROM presensi_harian WHERE nama = ? AND tanggal = ?", (nama, tanggal))
+
+def _apply(conn, record):
+    """Applies one check-in. The latest check-in of a day decides that day's status.
+
+    Re-applying a row, or an older row of the same day, changes nothing, so
+    duplicate check-ins and repeated syncs never double count. A later
+    check-in, or a Status corrected in place on the same row, moves the day
+    from the old counter to the new one.
+    """
+    waktu = str(record.get("Waktu", ""))
+    nama = str(record.get("Nama Pegawai", ""))
+    status = str(record.get("Status", ""))
+    if len(waktu) < 10 or not nama:
+        return False
+
+    tanggal = waktu[:10]
+    existing = conn.execute(
+        "SELECT status, waktu FROM presensi_harian WHERE nama = ? AND tanggal = ?", (nama, tanggal)
+    ).fetchone()
+    if existing and (existing[1] > waktu or (existing[1] == waktu and existing[0] == status)):
+        return False
+
+    _set_day(conn, nama, tanggal, existing[0] if existing else None, status, waktu)
+    return True
+
+def record_checkins(records):
+    """Applies check-ins right after they were saved. Returns the number that changed a counter."""
+    conn = open_recap()
+    try:
+        with write_transaction(conn):
+            return sum(_apply(conn, r) for r in records)
+    finally:
+        conn.close()
+
+def _latest_per_day(df):
+    """{(nama, tanggal): (status, waktu)} of the last check-in of every day in df."""
+    if df is None or df.empty or not {"Waktu", "Nama Pegawai", "Status"} <= set(df.columns):
+        return {}
+    rows = df[["Nama Pegawai", "Waktu", "Status"]].astype(str)
+    rows = rows[(rows["Waktu"].str.len() >= 10) & (rows["Nama Pegawai"] != "")]
+    rows = rows.assign(Tanggal=rows["Waktu"].str[:10])
+    # Stable sort: of two check-ins with the same Waktu the later sheet row wins, as in _apply
+    latest = rows.sort_values("Waktu", kind="stable").drop_duplicates(["Nama Pegawai", "Tanggal"], keep="last")
+    return {
+        (nama, tanggal): (status, waktu)
+        for nama, tanggal, status, waktu in latest[["Nama Pegawai", "Tanggal", "Status", "Waktu"]].itertuples(index=False)
+    }
+
+def sync(df, load_archived=None):
+    """Brings the recap in line with the hot attendance sheet df, which is the truth for its days.
+
+    Every day in df takes the status of its latest row, so statuses corrected
+    in place, whenever that happened, and deleted duplicates are applied; days
+    already right cost nothing. Days that left the hot sheet are looked up in
+    load_archived() (read only then, and once on the first sync to backfill)
+    and retracted when they are not archived either. Without load_archived
+    nothing is retracted. Returns the number of days changed.
+    """
+    hot = _latest_per_day(df)
+    backfill = load_archived is not None and get_setting(BACKFILL_KEY) is None
+    changed = 0
+    conn = open_recap()
+    try:
+        with write_transaction(conn):
+            days = {
+                (nama, tanggal): (status, waktu, arsip)
+                for nama, tanggal, status, waktu, arsip in conn.execute(
+                    "SELECT nama, tanggal, status, waktu, arsip FROM presensi_harian"
+                )
+            }
+            for (nama, tanggal), (status, waktu) in hot.items():
+                old = days.get((nama, tanggal))
+                if old is None or old[:2] != (status, waktu):
+                    _set_day(conn, nama, tanggal, old[0] if old else None, status, waktu)
+                    changed += 1
+
+            gone = [key for key, (_, _, arsip) in days.items() if not arsip and key not in hot]
+            if load_archived is None or not (backfill or gone):
+                return changed
+
+            archived = _latest_per_day(load_archived())
+            for (nama, tanggal), (status, waktu) in archived.items():
+                old = days.get((nama, tanggal))
+                if (nama, tanggal) in hot or (old is not None and old == (status, waktu, 1)):
+                    continue
+                _set_day(conn, nama, tanggal, old[0] if old else None, status, waktu, arsip=1)
+                changed += 1
+            for nama, tanggal in gone:
+                if (nama, tanggal) not in archived:
+                    _retract_day(conn, nama, tanggal, days[(nama, tanggal)][0])
+                    changed += 1
+    finally:
+        conn.close()
+
+    if backfill:
+        set_setting(BACKFILL_KEY, "1")
+    return changed
+
+def months():
+    conn = open_recap()
+    try:
+        return [b for (b,) in conn.execute("SELECT DISTINCT bulan FROM rekap_bulanan ORDER BY bulan DESC")]
+    finally:
+        conn.close()
+
+def monthly_recap(bulan):
+    """Hadir/Izin/Sakit day counts per employee for one month (YYYY-MM)."""
+    conn = open_recap()
+    try:
+        df = pd.read_sql_query(
+            "SELECT nama AS 'Nama Pegawai', hadir AS Hadir, izin AS Izin, sakit AS Sakit "
+            "FROM rekap_bulanan WHERE bulan = ? ORDER BY nama",
+            conn, params=(bulan,)
+        )
+    finally:
+        conn.close()
+    df["Total Hari"] = df[list(STATUSES)].sum(axis=1)
+    return df
@@ -0,0 +1,74 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Measures cold-start cost: import time of the heavy modules, and time-to-first-render
+# of main.py in a fresh process, before and after warmup.py primed the local caches.
+# Usage: python bench_startup.py > bench_output.txt
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ["streamlit", "pandas", "pyarrow", "gspread", "openpyxl"]
+
+IMPORT_SNIPPET = """
+import time
+t = time.perf_counter()
+import {module}
+print(f"{{time.perf_counter() - t:.3f}}")
+"""
+
+RENDER_SNIPPET = """
+import time
+t = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_import = time.perf_counter() - t
+at = AppTest.from_file({main!r}, default_timeout=120)
+t = time.perf_counter()
+at.run()
+print(f"{{t_import:.3f}} {{time.perf_counter() - t:.3f}} {{len(at.exception)}} {{len(at.error)}}")
+"""
+
+def run_python(code, cwd):
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return result.stdout.strip().splitlines()[-1]
+
+def make_sandbox():
+    """Copies the app into a temp dir so the bench starts from empty local caches."""
+    sandbox = tempfile.mkdtemp(prefix="sirumat_bench_")
+    for name in os.listdir(REPO_DIR):
+        if name.endswith(".py"):
+            shutil.copy(os.path.join(REPO_DIR, name), sandbox)
+    for name in ("service_account.json", ".streamlit"):
+        if os.path.exists(os.path.join(REPO_DIR, name)):
+            os.symlink(os.path.join(REPO_DIR, name), os.path.join(sandbox, name))
+    return sandbox
+
+def time_first_render(sandbox, label, repeat=3):
+    main = os.path.join(sandbox, "main.py")
+    runs = []
+    for _ in range(repeat):
+        t_import, t_render, n_exc, n_err = run_python(RENDER_SNIPPET.format(main=main), sandbox).split()
+        runs.append(float(t_render))
+    print(f"{label:<28} streamlit import {float(t_import):.3f}s  first render best {min(runs):.3f}s  "
+          f"worst {max(runs):.3f}s  (exceptions={n_exc}, errors={n_err})")
+
+print("== Import time (fresh process) ==")
+for module in HEAVY_MODULES:
+    try:
+        print(f"{module:<12} {float(run_python(IMPORT_SNIPPET.format(module=module), REPO_DIR)):.3f}s")
+    except RuntimeError as e:
+        print(f"{module:<12} not importable: {e}")
+
+print("\n== Time to first render of main.py (fresh process) ==")
+sandbox = make_sandbox()
+try:
+    # Only the first run is truly cold; later runs already find the snapshots written by it
+    time_first_render(sandbox, "cold (empty caches)", repeat=1)
+    shutil.rmtree(os.path.join(sandbox, "data_lokal"), ignore_errors=True)
+    print(f"warmup.py: {run_python('import warmup', sandbox)}")
+    time_first_render(sandbox, "after warmup.py")
+finally:
+    shutil.rmtree(sandbox, ignore_errors=True)
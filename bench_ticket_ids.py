@@ -0,0 +1,59 @@
+import multiprocessing
+import sys
+import threading
+import time
+
+from ticket_ids import TicketIdAllocator, next_ticket_id
+
+# Concurrent stress test for the Tiket ID allocator: many threads per process and
+# several processes at once, all IDs checked for collisions and per-thread ordering.
+# Usage: python bench_ticket_ids.py [ids_per_thread] > bench_output.txt
+
+IDS_PER_THREAD = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+THREADS = 8
+PROCESSES = 4
+
+def generate_in_threads(_=None):
+    """Returns (ids, all per-thread sequences increasing) from THREADS threads sharing the allocator."""
+    results = [None] * THREADS
+
+    def worker(i):
+        results[i] = [next_ticket_id() for _ in range(IDS_PER_THREAD)]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ordered = all(ids == sorted(ids) for ids in results)
+    return [i for ids in results for i in ids], ordered
+
+def report(label, ids, ordered, elapsed):
+    duplicates = len(ids) - len(set(ids))
+    print(f"{label:<32} {len(ids):>8} IDs  {len(ids) / elapsed:>10,.0f} IDs/s  "
+          f"duplicates={duplicates}  ordered={ordered}")
+    return duplicates
+
+if __name__ == "__main__":
+    failures = 0
+
+    t = time.perf_counter()
+    ids, ordered = generate_in_threads()
+    failures += report(f"1 process x {THREADS} threads", ids, ordered, time.perf_counter() - t)
+
+    t = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(PROCESSES) as pool:
+        batches = pool.map(generate_in_threads, range(PROCESSES))
+    ids = [i for batch, _ in batches for i in batch]
+    failures += report(f"{PROCESSES} processes x {THREADS} threads", ids, all(o for _, o in batches),
+                       time.perf_counter() - t)
+
+    # A clock that stands still and then jumps back must not produce repeats
+    frozen = iter([1700000000.0] * 30000 + [1699999999.0] * 30000)
+    allocator = TicketIdAllocator(node="000000", clock=lambda: next(frozen))
+    t = time.perf_counter()
+    ids = [allocator.next_id() for _ in range(60000)]
+    failures += report("frozen + backwards clock", ids, ids == sorted(ids), time.perf_counter() - t)
+
+    print("RESULT:", "OK" if failures == 0 else f"FAILED ({failures} duplicates)")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,244 @@
+import math
+import re
+
+import pandas as pd
+
+# One row per worksheet: Sheet | Baris | Total | Blok 1 | Blok 2 | ...
+# Everything after Sheet is a formula, so Google computes the checksums server-side
+# and reading them back is one small range read.
+CHECKSUM_SHEET = "Meta_Checksum"
+CHECKSUM_HEADERS = ["Sheet", "Baris", "Total"]
+FIRST_BLOCK_COL = len(CHECKSUM_HEADERS) + 1
+
+BLOCK_ROWS = 500
+
+# Above this share of differing blocks a full download is cheaper than range reads
+FULL_RELOAD_RATIO = 0.5
+
+# Integer cells also add their value modulo this prime, so 1200 -> 1300 is caught;
+# the modulus keeps block sums well inside the exact range of Sheets' doubles
+NUMBER_MODULUS = 65521
+INTEGER_PATTERN = re.compile(r"-?[0-9]{1,15}")
+
+def cell_checksum(text, row, col):
+    """Checksum of one cell, matching the Sheets formula from block_formula().
+
+    Length plus the first, middle and last character codes, plus the value of
+    integer cells, weighted by the cell's position so swapped cells or rows
+    also change the sum. Sheets formulas have no hash function, so a text edit
+    that keeps the length and those three characters (e.g. "Gudang A1" ->
+    "Gudang B1") still goes unnoticed.
+    """
+    if text == "":
+        return 0
+    n = len(text)
+    value = n + 7 * ord(text[0]) + 13 * ord(text[-1]) + 17 * ord(text[n // 2])
+    if INTEGER_PATTERN.fullmatch(text):
+        value += int(text) % NUMBER_MODULUS
+    return value * (row % 97 + 101 * col)
+
+def _quote(sheet_name):
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+def block_range(sheet_name, block, n_cols):
+    from gspread.utils import rowcol_to_a1
+
+    start = 2 + block * BLOCK_ROWS
+    return f"{_quote(sheet_name)}!{rowcol_to_a1(start, 1)}:{rowcol_to_a1(start + BLOCK_ROWS - 1, n_cols)}"
+
+def block_formula(sheet_name, block, n_cols):
+    r = block_range(sheet_name, block, n_cols)
+    return (
+        f"=ARRAYFORMULA(SUM((LEN({r})+7*IFERROR(CODE({r}),0)+13*IFERROR(CODE(RIGHT({r},1)),0)"
+        f"+17*IFERROR(CODE(MID({r},INT(LEN({r})/2)+1,1)),0)"
+        f"+IFERROR(IF(REGEXMATCH(TO_TEXT({r}),\"^-?[0-9]{{1,15}}$\"),MOD(VALUE(TO_TEXT({r})),{NUMBER_MODULUS}),0),0))"
+        f"*(MOD(ROW({r}),97)+101*COLUMN({r}))))"
+    )
+
+def formula_row(sheet_name, meta_row, n_cols, n_rows):
+    """The Meta_Checksum row for a worksheet whose grid has n_rows rows and n_cols header columns."""
+    from gspread.utils import rowcol_to_a1
+
+    # One spare block, so rows appended past a full grid are still covered
+    n_blocks = math.ceil(max(n_rows - 1, 0) / BLOCK_ROWS) + 1
+    blocks = f"{rowcol_to_a1(meta_row, FIRST_BLOCK_COL)}:{rowcol_to_a1(meta_row, FIRST_BLOCK_COL + n_blocks - 1)}"
+    return [
+        sheet_name,
+        f"=COUNTA({_quote(sheet_name)}!A2:A)",
+        f"=SUM({blocks})",
+    ] + [block_formula(sheet_name, b, n_cols) for b in range(n_blocks)]
+
+def _normalize_formula(value):
+    # Sheets drops redundant quotes and spaces when it stores a formula
+    return str(value).replace("'", "").replace(" ", "").upper()
+
+def ensure_formulas(sh, skip=()):
+    """Creates or updates the Meta_Checksum row of every data worksheet.
+
+    Rows are only rewritten when the worksheet grid or its header grew. Returns
+    {sheet: (meta row number, header column count)}.
+    """
+    import gspread
+
+    try:
+        meta_ws = sh.worksheet(CHECKSUM_SHEET)
+    except gspread.WorksheetNotFound:
+        meta_ws = sh.add_worksheet(title=CHECKSUM_SHEET, rows=20, cols=20)
+        meta_ws.append_row(CHECKSUM_HEADERS)
+
+    data_sheets = [ws for ws in sh.worksheets() if ws.title not in (CHECKSUM_SHEET, *skip)]
+    headers = sh.values_batch_get([f"{_quote(ws.title)}!1:1" for ws in data_sheets]).get("valueRanges", [])
+    values = sh.values_get(f"{CHECKSUM_SHEET}!A1:ZZZ", params={"valueRenderOption": "FORMULA"}).get("values", [])
+    header, existing = (values[0] if values else []), values[1:]
+    rows = {row[0]: (i, row) for i, row in enumerate(existing, start=2) if row and row[0]}
+    next_row = len(existing) + 2
+
+    layout, updates, width = {}, [], len(CHECKSUM_HEADERS)
+    for ws, sheet_header in zip(data_sheets, headers):
+        n_cols = max(1, len((sheet_header.get("values") or [[]])[0]))
+        meta_row, current = rows.get(ws.title, (None, []))
+        if meta_row is None:
+            meta_row, next_row = next_row, next_row + 1
+        expected = formula_row(ws.title, meta_row, n_cols, ws.row_count)
+        if [_normalize_formula(v) for v in current] != [_normalize_formula(v) for v in expected]:
+            updates.append({"range": f"A{meta_row}", "values": [expected]})
+        layout[ws.title] = (meta_row, n_cols)
+        width = max(width, len(expected))
+
+    # Named block columns keep the worksheet readable by get_all_records (no blank, duplicate headers)
+    expected_header = CHECKSUM_HEADERS + [f"Blok {b}" for b in range(1, width - len(CHECKSUM_HEADERS) + 1)]
+    if header[:len(expected_header)] != expected_header:
+        updates.append({"range": "A1", "values": [expected_header]})
+
+    if updates:
+        width = max(len(u["values"][0]) for u in updates)
+        if meta_ws.col_count < width:
+            meta_ws.add_cols(width - meta_ws.col_count)
+        if meta_ws.row_count < next_row - 1:
+            meta_ws.add_rows(next_row - 1 - meta_ws.row_count)
+        meta_ws.batch_update(updates, value_input_option="USER_ENTERED")
+    return layout
+
+def read_layout(sh, sheet_names):
+    """Same result as ensure_formulas() for the given worksheets, without writing anything.
+
+    For readers running in every replica; worksheets without a Meta_Checksum
+    row are left out. Raises the API error when Meta_Checksum does not exist.
+    """
+    value_ranges = sh.values_batch_get(
+        [f"{CHECKSUM_SHEET}!A2:A"] + [f"{_quote(name)}!1:1" for name in sheet_names]
+    ).get("valueRanges", [])
+    meta_rows = {
+        row[0]: i for i, row in enumerate(value_ranges[0].get("values", []), start=2) if row and row[0]
+    }
+    layout = {}
+    for name, sheet_header in zip(sheet_names, value_ranges[1:]):
+        if name in meta_rows:
+            layout[name] = (meta_rows[name], max(1, len((sheet_header.get("values") or [[]])[0])))
+    return layout
+
+def _as_int(value):
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        # #REF! and friends: never equal to a local checksum
+        return None
+
+def read_summaries(sh):
+    """Level 1: {sheet: (non-empty rows, total checksum)} for all worksheets in one read."""
+    values = sh.values_get(
+        f"{CHECKSUM_SHEET}!A2:C", params={"valueRenderOption": "UNFORMATTED_VALUE"}
+    ).get("values", [])
+    return {
+        row[0]: (_as_int(row[1]) if len(row) > 1 else None, _as_int(row[2]) if len(row) > 2 else None)
+        for row in values if row and row[0]
+    }
+
+def read_blocks(sh, meta_row):
+    """Level 2: the block checksums of one worksheet."""
+    from gspread.utils import rowcol_to_a1
+
+    values = sh.values_get(
+        f"{CHECKSUM_SHEET}!{rowcol_to_a1(meta_row, FIRST_BLOCK_COL)}:ZZZ{meta_row}",
+        params={"valueRenderOption": "UNFORMATTED_VALUE"}
+    ).get("values", [])
+    return [_as_int(v) for v in (values[0] if values else [])]
+
+def local_blocks(df, n_cols):
+    """Block checksums of a snapshot, computed exactly as the Sheets formulas do."""
+    blocks = [0] * math.ceil(len(df) / BLOCK_ROWS)
+    columns = list(df.columns[:n_cols])
+    for col_no, col in enumerate(columns, start=1):
+        for i, value in enumerate(df[col].astype(str)):
+            if value:
+                blocks[i // BLOCK_ROWS] += cell_checksum(value, i + 2, col_no)
+    return blocks
+
+def local_summary(df, blocks):
+    rows = int((df.iloc[:, 0].astype(str) != "").sum()) if len(df.columns) else 0
+    return rows, sum(blocks)
+
+def diff_blocks(local, remote):
+    """Indices of blocks whose checksums differ; missing blocks count as empty (0)."""
+    n = max(len(local), len(remote))
+    local = local + [0] * (n - len(local))
+    remote = remote + [0] * (n - len(remote))
+    return [b for b in range(n) if local[b] != remote[b]]
+
+def fetch_blocks(sh, sheet_name, n_cols, blocks):
+    """Reads only the given blocks, in one batch call. Returns {block: rows as get_all_records types}."""
+    from gspread.utils import numericise_all
+
+    ranges = [block_range(sheet_name, b, n_cols) for b in blocks]
+    value_ranges = sh.values_batch_get(ranges).get("valueRanges", [])
+    fetched = {}
+    for block, value_range in zip(blocks, value_ranges):
+        rows = value_range.get("values", [])
+        # The API leaves out trailing empty rows and cells
+        rows = rows + [[]] * (BLOCK_ROWS - len(rows))
+        fetched[block] = [numericise_all((row + [""] * n_cols)[:n_cols], default_blank="") for row in rows]
+    return fetched
+
+def patch_frame(df, fetched):
+    """Returns the snapshot with the fetched blocks swapped in and trailing empty rows dropped."""
+    n_blocks = max([math.ceil(len(df) / BLOCK_ROWS)] + [b + 1 for b in fetched])
+    parts = []
+    for b in range(n_blocks):
+        if b in fetched:
+            parts.append(pd.DataFrame(fetched[b], columns=df.columns, dtype=object))
+        else:
+            part = df.iloc[b * BLOCK_ROWS:(b + 1) * BLOCK_ROWS].astype(object).reset_index(drop=True)
+            parts.append(part.reindex(range(BLOCK_ROWS), fill_value=""))
+    out = pd.concat(parts, ignore_index=True)
+
+    filled = (out.astype(str) != "").any(axis=1).to_numpy()
+    last = filled.nonzero()[0]
+    out = out.iloc[:last[-1] + 1 if len(last) else 0].reset_index(drop=True)
+
+    # Keep numeric columns numeric (the inventory pages compare Stok with Min Stok)
+    for col in df.columns:
+        if df[col].dtype != object and pd.api.types.is_numeric_dtype(df[col].dtype):
+            try:
+                out[col] = out[col].astype(df[col].dtype)
+            except (TypeError, ValueError):
+                pass
+    return out
+
+def repair(sh, sheet_name, df, n_cols, remote, differing):
+    """Re-reads the differing blocks of a snapshot and patches them in.
+
+    Falls back to one full download when the header changed or most blocks
+    differ. Returns (repaired DataFrame, DataFrame of the re-read rows, full reload?).
+    """
+    if len(df.columns) != n_cols or len(differing) > FULL_RELOAD_RATIO * len(remote):
+        from sheets_client import fetch_records
+
+        full = fetch_records(sh, sheet_name)
+        return full, full, True
+
+    fetched = fetch_blocks(sh, sheet_name, n_cols, differing)
+    changed = pd.DataFrame(
+        [row for block in fetched.values() for row in block if any(v != "" for v in row)],
+        columns=df.columns
+    )
+    return patch_frame(df, fetched), changed, False
@@ -0,0 +1,205 @@
+import re
+from datetime import datetime
+
+import pandas as pd
+
+from ticket_ids import next_ticket_id
+
+# Rows per Sheets write call; keeps each request small and well under the API quotas
+CHUNK_ROWS = 200
+
+# Per target worksheet: columns the file must provide, and defaults for the ones it may omit
+TARGETS = {
+    "Inventaris_Barang": {
+        "required": ["Nama Barang", "Kategori", "Stok", "Satuan", "Min Stok"],
+        "defaults": {"Terakhir Update": lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S")},
+        "numeric": ["Stok", "Min Stok"],
+        "upsert_key": "Nama Barang",
+    },
+    "Laporan_Kerusakan": {
+        "required": ["Tanggal", "Nama Pelapor", "Lokasi", "Kendala"],
+        "defaults": {"Bukti Foto": lambda: "-", "Tiket ID": next_ticket_id, "Status": lambda: "Pending"},
+        "numeric": [],
+        "upsert_key": None,
+    },
+    "Laporan_Perbaikan": {
+        "required": ["Tanggal", "Nama Teknisi", "Lokasi", "Tindakan Perbaikan"],
+        "defaults": {"Bukti Foto": lambda: "-", "Tiket ID": lambda: "-"},
+        "numeric": [],
+        "upsert_key": None,
+    },
+}
+
+STATUS_VALUES = ("Pending", "Selesai")
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}(:\d{2})?)?$")
+
+def iter_chunks(uploaded_file, chunk_rows=CHUNK_ROWS):
+    """Streams an uploaded CSV/XLSX as (first file row number, DataFrame of text) chunks.
+
+    The whole file is never held as one DataFrame. XLSX is read with openpyxl's
+    read-only mode, which parses rows lazily.
+    """
+    if uploaded_file.name.lower().endswith(".csv"):
+        first_row = 2
+        for chunk in pd.read_csv(uploaded_file, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+            chunk.columns = [str(c).strip() for c in chunk.columns]
+            yield first_row, chunk
+            first_row += len(chunk)
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        buffer, first_row = [], 2
+        for values in rows:
+            if all(v is None or str(v).strip() == "" for v in values):
+                continue
+            buffer.append(["" if v is None else _cell_text(v) for v in values[:len(headers)]])
+            if len(buffer) == chunk_rows:
+                yield first_row, pd.DataFrame(buffer, columns=headers[:len(buffer[0])])
+                first_row += len(buffer)
+                buffer = []
+        if buffer:
+            yield first_row, pd.DataFrame(buffer, columns=headers[:len(buffer[0])])
+    finally:
+        workbook.close()
+
+def estimate_rows(uploaded_file):
+    """Data row count for the progress bar, without parsing the file."""
+    if uploaded_file.name.lower().endswith(".csv"):
+        total = uploaded_file.getvalue().count(b"\n") - 1
+    else:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(uploaded_file, read_only=True)
+        total = (workbook.active.max_row or 1) - 1
+        workbook.close()
+    uploaded_file.seek(0)
+    return max(total, 1)
+
+def row_index_for(ws, sheet_headers, key_col):
+    """Maps each existing key (e.g. Nama Barang) to its sheet row number, from one column read."""
+    values = ws.col_values(sheet_headers.index(key_col) + 1)
+    return {value: i for i, value in enumerate(values, start=1) if i > 1 and value}
+
+def _cell_text(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def check_headers(target, file_columns, sheet_headers):
+    """Returns a list of problems with the file's header row (empty when it can be imported)."""
+    spec = TARGETS[target]
+    problems = []
+    missing = [c for c in spec["required"] if c not in file_columns]
+    if missing:
+        problems.append(f"Kolom wajib tidak ada: {', '.join(missing)}")
+    unknown = [c for c in file_columns if c and c not in sheet_headers]
+    if unknown:
+        problems.append(f"Kolom tidak dikenal di sheet {target}: {', '.join(unknown)}")
+    return problems
+
+def validate_chunk(target, first_row, chunk):
+    """Splits a chunk into valid rows (as dicts) and per-row errors {Baris, Kolom, Pesan}."""
+    spec = TARGETS[target]
+    valid, errors = [], []
+    for offset, row in enumerate(chunk.to_dict("records")):
+        baris = first_row + offset
+        row = {k: str(v).strip() for k, v in row.items() if k}
+        row_errors = []
+
+        for col in spec["required"]:
+            if not row.get(col):
+                row_errors.append((col, "wajib diisi"))
+        for col in spec["numeric"]:
+            if row.get(col) and not re.fullmatch(r"\d+", row[col]):
+                row_errors.append((col, f"harus bilangan bulat >= 0, bukan '{row[col]}'"))
+        if row.get("Tanggal"):
+            if not DATE_PATTERN.match(row["Tanggal"]):
+                row_errors.append(("Tanggal", f"format harus YYYY-MM-DD HH:MM:SS, bukan '{row['Tanggal']}'"))
+            elif len(row["Tanggal"]) == 10:
+                row["Tanggal"] += " 00:00:00"
+            elif len(row["Tanggal"]) == 16:
+                row["Tanggal"] += ":00"
+        if row.get("Status") and row["Status"] not in STATUS_VALUES:
+            row_errors.append(("Status", f"harus salah satu dari {', '.join(STATUS_VALUES)}"))
+
+        if row_errors:
+            errors.extend({"Baris": baris, "Kolom": col, "Pesan": pesan} for col, pesan in row_errors)
+            continue
+
+        for col, default in spec["defaults"].items():
+            if not row.get(col):
+                row[col] = default()
+        # Written as numbers, like the inventory form does; dates stay text as in the forms
+        for col in spec["numeric"]:
+            row[col] = int(row[col])
+        valid.append(row)
+    return valid, errors
+
+def to_sheet_rows(rows, sheet_headers):
+    """Orders row dicts by the worksheet's header row."""
+    return [[row.get(h, "") for h in sheet_headers] for row in rows]
+
+def upsert_rows(ws, sheet_headers, rows, key_col, row_index):
+    """Updates rows whose key already exists and appends the rest, in two batch calls.
+
+    Updates only write the columns the file has (plus filled-in defaults), so
+    sheet columns the file leaves out keep their values.
+
+    row_index maps key -> sheet row number and is updated with appended rows,
+    using the rows the API reports it wrote (blank rows or a concurrent append
+    may put them anywhere after the last key), so a key repeated later in the
+    file updates the row added for it earlier. Returns (updated, appended).
+    """
+    updates, appends = {}, {}
+    for row in rows:
+        key = row[key_col]
+        if key in row_index:
+            updates[row_index[key]] = row
+        else:
+            # A key repeated within one chunk: the last occurrence wins
+            appends[key] = row
+
+    if updates:
+        ws.batch_update([entry for r, row in updates.items() for entry in _update_ranges(r, row, sheet_headers)])
+    if appends:
+        response = ws.append_rows(to_sheet_rows(list(appends.values()), sheet_headers))
+        first_row = appended_first_row(response)
+        for i, key in enumerate(appends):
+            row_index[key] = first_row + i
+    return len(updates), len(appends)
+
+def _update_ranges(sheet_row, row, sheet_headers):
+    """batch_update entries writing the row's own columns, one range per run of adjacent columns."""
+    entries, start = [], None
+    for col, header in enumerate(sheet_headers + [None], start=1):
+        if header is not None and header in row:
+            start = start or col
+        elif start:
+            values = [row[h] for h in sheet_headers[start - 1:col - 1]]
+            entries.append({
+                "range": f"{_column_letter(start)}{sheet_row}:{_column_letter(col - 1)}{sheet_row}",
+                "values": [values]
+            })
+            start = None
+    return entries
+
+def appended_first_row(response):
+    """Sheet row number of the first row written by append_rows, from the response's updatedRange."""
+    from gspread.utils import a1_range_to_grid_range
+
+    updated_range = response["updates"]["updatedRange"]
+    return a1_range_to_grid_range(updated_range.split("!")[-1])["startRowIndex"] + 1
+
+def _column_letter(n):
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
@@ -0,0 +1,164 @@
+import os
+import time
+
+from local_store import connect
+
+UPLOAD_DIR = "galeri_bukti"
+
+# Files younger than this are never collected: the sheet row may still be on its way
+ORPHAN_GRACE_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS galeri_file (
+    nama TEXT PRIMARY KEY,
+    ukuran INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS galeri_ref (
+    sumber TEXT NOT NULL,
+    nama TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    bulan TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_galeri_ref_nama ON galeri_ref (nama);
+CREATE INDEX IF NOT EXISTS idx_galeri_ref_sumber ON galeri_ref (sumber);
+CREATE TABLE IF NOT EXISTS galeri_sumber (
+    sumber TEXT PRIMARY KEY,
+    versi TEXT NOT NULL
+);
+"""
+
+def open_index():
+    conn = connect()
+    conn.executescript(SCHEMA)
+    return conn
+
+def file_key(path):
+    """Bukti Foto values are paths inside galeri_bukti; the file name alone identifies the file.
+
+    Paths written on Windows use backslashes, so both separators are handled.
+    """
+    if not path or str(path).strip() in ("", "-"):
+        return None
+    return os.path.basename(str(path).replace("\\", "/"))
+
+def source_changed(sumber, versi):
+    conn = open_index()
+    try:
+        row = conn.execute("SELECT versi FROM galeri_sumber WHERE sumber = ?", (sumber,)).fetchone()
+    finally:
+        conn.close()
+    return row is None or row[0] != str(versi)
+
+def replace_refs(sumber, sheet_name, refs, versi):
+    """Replaces every reference recorded for one source (a worksheet or an archive partition).
+
+    refs is an iterable of (Bukti Foto path, YYYY-MM month).
+    """
+    rows = [(sumber, key, sheet_name, bulan) for key, bulan in ((file_key(p), b) for p, b in refs) if key]
+    conn = open_index()
+    try:
+        with conn:
+            conn.execute("DELETE FROM galeri_ref WHERE sumber = ?", (sumber,))
+            conn.executemany("INSERT INTO galeri_ref (sumber, nama, sheet, bulan) VALUES (?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT INTO galeri_sumber (sumber, versi) VALUES (?, ?) "
+                "ON CONFLICT (sumber) DO UPDATE SET versi = excluded.versi",
+                (sumber, str(versi))
+            )
+    finally:
+        conn.close()
+    return len(rows)
+
+def refs_from_dataframe(df, date_col):
+    """Yields (Bukti Foto path, month) for the rows of a sheet or archive partition."""
+    if df.empty or "Bukti Foto" not in df.columns:
+        return []
+    if date_col in df.columns:
+        months = df[date_col].astype(str).str[:7]
+    else:
+        months = [""] * len(df)
+    return list(zip(df["Bukti Foto"].astype(str), months))
+
+def sync_files(upload_dir=UPLOAD_DIR):
+    """Brings the file table up to date. Returns (added, removed).
+
+    The listing is skipped entirely while the directory mtime is unchanged, and
+    only names not seen before are stat'ed.
+    """
+    if not os.path.isdir(upload_dir):
+        return 0, 0
+
+    dir_versi = os.stat(upload_dir).st_mtime_ns
+    if not source_changed("dir:" + upload_dir, dir_versi):
+        return 0, 0
+
+    conn = open_index()
+    try:
+        known = {nama for (nama,) in conn.execute("SELECT nama FROM galeri_file")}
+        on_disk = set()
+        added = []
+        with os.scandir(upload_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                on_disk.add(entry.name)
+                if entry.name not in known:
+                    stat = entry.stat()
+                    added.append((entry.name, stat.st_size, stat.st_mtime))
+        removed = known - on_disk
+
+        with conn:
+            conn.executemany("INSERT INTO galeri_file (nama, ukuran, mtime) VALUES (?, ?, ?)", added)
+            conn.executemany("DELETE FROM galeri_file WHERE nama = ?", [(n,) for n in removed])
+            conn.execute(
+                "INSERT INTO galeri_sumber (sumber, versi) VALUES (?, ?) "
+                "ON CONFLICT (sumber) DO UPDATE SET versi = excluded.versi",
+                ("dir:" + upload_dir, str(dir_versi))
+            )
+    finally:
+        conn.close()
+    return len(added), len(removed)
+
+def find_orphans(grace_seconds=ORPHAN_GRACE_SECONDS):
+    """Lists (file name, size) of files no worksheet or archive row points to."""
+    conn = open_index()
+    try:
+        return conn.execute(
+            "SELECT f.nama, f.ukuran FROM galeri_file f "
+            "WHERE f.mtime < ? AND NOT EXISTS (SELECT 1 FROM galeri_ref r WHERE r.nama = f.nama) "
+            "ORDER BY f.nama",
+            (time.time() - grace_seconds,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+def remove_files(names, upload_dir=UPLOAD_DIR):
+    """Deletes files from disk and from the file table. Returns the number of bytes reclaimed."""
+    reclaimed = 0
+    conn = open_index()
+    try:
+        with conn:
+            for nama in names:
+                path = os.path.join(upload_dir, nama)
+                try:
+                    reclaimed += os.path.getsize(path)
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                conn.execute("DELETE FROM galeri_file WHERE nama = ?", (nama,))
+    finally:
+        conn.close()
+    return reclaimed
+
+def usage_report():
+    """Returns (sheet, month, file count, bytes) rows; unreferenced files are reported as '(orphan)'."""
+    conn = open_index()
+    try:
+        return conn.execute(
+            "SELECT COALESCE(r.sheet, '(orphan)'), COALESCE(r.bulan, ''), COUNT(DISTINCT f.nama), SUM(f.ukuran) "
+            "FROM galeri_file f LEFT JOIN (SELECT DISTINCT nama, sheet, bulan FROM galeri_ref) r ON r.nama = f.nama "
+            "GROUP BY 1, 2 ORDER BY 1, 2"
+        ).fetchall()
+    finally:
+        conn.close()
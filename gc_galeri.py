@@ -0,0 +1,120 @@
+import gspread
+import os
+import pandas as pd
+import sys
+
+from archive_store import ARCHIVE_DIR, DATE_COLUMNS, list_partitions, partition_path
+from block_checksum import CHECKSUM_SHEET
+from gallery_index import (
+    file_key, find_orphans, refs_from_dataframe, remove_files, replace_refs, source_changed, sync_files, usage_report
+)
+from sheet_versions import META_SHEET, read_versions
+
+# Usage: python gc_galeri.py [--dry-run]
+DRY_RUN = "--dry-run" in sys.argv
+
+print("Collecting orphaned files in galeri_bukti...")
+
+if not os.path.exists('service_account.json'):
+    print("ERROR: service_account.json not found!")
+    exit()
+
+def referenced_in_sheets(sh):
+    """Reads the Bukti Foto column of every worksheet afresh. Returns the referenced file names.
+
+    Version tokens are best-effort (a failed bump or a manual edit leaves them
+    unchanged), so deletion is never decided on the incremental index alone.
+    """
+    referenced = set()
+    for ws in sh.worksheets():
+        if ws.title in (META_SHEET, CHECKSUM_SHEET):
+            continue
+        headers = ws.row_values(1)
+        if "Bukti Foto" in headers:
+            referenced.update(file_key(v) for v in ws.col_values(headers.index("Bukti Foto") + 1)[1:])
+    return referenced
+
+def date_column(columns):
+    for col in ("Tanggal", "Waktu"):
+        if col in columns:
+            return col
+    return None
+
+try:
+    gc = gspread.service_account(filename='service_account.json')
+    try:
+        sh = gc.open("database_sirumat")
+    except gspread.SpreadsheetNotFound:
+        sh = gc.open("Database_SiRumat")
+
+    print(f"Connected to: {sh.title}")
+
+    # Files are only collected when every reference source was read in this run;
+    # a failed read would otherwise make all of its photos look orphaned.
+    all_sources_ok = True
+
+    # 1. Hot worksheets: only re-read the ones whose version token moved
+    versions, _ = read_versions(sh)
+    for ws in sh.worksheets():
+        if ws.title in (META_SHEET, CHECKSUM_SHEET):
+            continue
+        versi = versions.get("*", versions.get(ws.title, ""))
+        if not source_changed("sheet:" + ws.title, versi):
+            print(f"{ws.title}: unchanged, skipped.")
+            continue
+        try:
+            df = pd.DataFrame(ws.get_all_records())
+            refs = refs_from_dataframe(df, date_column(df.columns))
+            count = replace_refs("sheet:" + ws.title, ws.title, refs, versi)
+            print(f"{ws.title}: {count} photo references indexed.")
+        except Exception as e:
+            all_sources_ok = False
+            print(f"Error reading {ws.title}: {e}")
+
+    # 2. Archived partitions: re-read a partition only when its file changed
+    for sheet_name, date_col in DATE_COLUMNS.items():
+        for month in list_partitions(sheet_name):
+            path = partition_path(sheet_name, month)
+            versi = os.stat(path).st_mtime_ns
+            sumber = f"arsip:{sheet_name}/{month}"
+            if not source_changed(sumber, versi):
+                continue
+            try:
+                df = pd.read_parquet(path, columns=["Bukti Foto", date_col])
+                count = replace_refs(sumber, sheet_name, refs_from_dataframe(df, date_col), versi)
+                print(f"{ARCHIVE_DIR}/{sheet_name}/{month}: {count} photo references indexed.")
+            except Exception as e:
+                all_sources_ok = False
+                print(f"Error reading {path}: {e}")
+
+    # 3. Files on disk
+    added, removed = sync_files()
+    print(f"galeri_bukti: {added} new files, {removed} files gone since last run.")
+
+    # 4. Collect
+    orphans = find_orphans()
+    orphan_bytes = sum(size for _, size in orphans)
+    print(f"Found {len(orphans)} orphaned files ({orphan_bytes / 1024 / 1024:.2f} MB).")
+    if orphans and DRY_RUN:
+        for name, _ in orphans:
+            print(f"- {name}")
+    elif orphans and not all_sources_ok:
+        print("WARNING: Some sources could not be read; no files were deleted.")
+    elif orphans:
+        # Last check against the live sheets: a row whose version bump was lost still counts
+        still_used = referenced_in_sheets(sh)
+        kept = [name for name, _ in orphans if name in still_used]
+        if kept:
+            print(f"{len(kept)} files are still referenced in the sheets (stale version token), kept.")
+        to_delete = [name for name, _ in orphans if name not in still_used]
+        reclaimed = remove_files(to_delete)
+        print(f"Deleted {len(to_delete)} files, reclaimed {reclaimed / 1024 / 1024:.2f} MB.")
+
+    print("\n--- Disk usage per sheet and month ---")
+    for sheet_name, month, files, size in usage_report():
+        print(f"{sheet_name:<20} {month or '-':<8} {files:>5} files {size / 1024 / 1024:>9.2f} MB")
+
+    print("\nGC Complete!")
+
+except Exception as e:
+    print(f"CRITICAL ERROR: {e}")
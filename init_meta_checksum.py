@@ -0,0 +1,32 @@
+import gspread
+import os
+
+from block_checksum import CHECKSUM_SHEET, ensure_formulas
+from sheet_versions import META_SHEET
+
+# Writes the Meta_Checksum formulas the live boards and reconcile_sheets.py compare
+# against. Run once after setup and again when a worksheet grid or header grows;
+# the app itself only reads them.
+print("Initializing Meta_Checksum Worksheet...")
+
+if not os.path.exists('service_account.json'):
+    print("ERROR: service_account.json not found!")
+    exit()
+
+try:
+    gc = gspread.service_account(filename='service_account.json')
+    try:
+        sh = gc.open("database_sirumat")
+    except gspread.SpreadsheetNotFound:
+        sh = gc.open("Database_SiRumat")
+
+    print(f"Connected to: {sh.title}")
+
+    layout = ensure_formulas(sh, skip=(META_SHEET,))
+    for sheet_name, (meta_row, n_cols) in layout.items():
+        print(f"{sheet_name}: row {meta_row} of '{CHECKSUM_SHEET}', {n_cols} columns.")
+
+    print("\nMeta_Checksum Ready!")
+
+except Exception as e:
+    print(f"CRITICAL ERROR: {e}")
@@ -0,0 +1,39 @@
+import gspread
+import os
+
+from block_checksum import CHECKSUM_SHEET
+from sheet_versions import META_HEADERS, META_SHEET, new_token
+
+print("Initializing Meta_Versi Worksheet...")
+
+if not os.path.exists('service_account.json'):
+    print("ERROR: service_account.json not found!")
+    exit()
+
+try:
+    gc = gspread.service_account(filename='service_account.json')
+    try:
+        sh = gc.open("database_sirumat")
+    except gspread.SpreadsheetNotFound:
+        sh = gc.open("Database_SiRumat")
+    
+    print(f"Connected to: {sh.title}")
+    
+    try:
+        ws = sh.worksheet(META_SHEET)
+        print(f"Worksheet '{META_SHEET}' already exists.")
+    except gspread.WorksheetNotFound:
+        print(f"Worksheet '{META_SHEET}' not found. Creating...")
+        ws = sh.add_worksheet(title=META_SHEET, rows=100, cols=3)
+        ws.append_row(META_HEADERS)
+        print(f"Created '{META_SHEET}' with headers: {META_HEADERS}")
+
+    # One version row per data worksheet, so the app only ever updates cells in place
+    existing = ws.col_values(1)
+    for data_ws in sh.worksheets():
+        if data_ws.title not in (META_SHEET, CHECKSUM_SHEET) and data_ws.title not in existing:
+            ws.append_row([data_ws.title, new_token(), "-"])
+            print(f"Added version row for {data_ws.title}")
+
+except Exception as e:
+    print(f"CRITICAL ERROR: {e}")
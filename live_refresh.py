@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+import attendance_recap
+import shared_cache
+import ticket_lifecycle
+from block_checksum import (
+    diff_blocks, local_blocks, local_summary, read_blocks, read_layout, read_summaries, repair
+)
+from search_index import SEARCH_FIELDS, index_records
+from sheet_versions import read_versions
+
+# Worksheets shown on the live boards (Kerumahtanggaan and Absensi)
+WATCHED = ("Laporan_Kerusakan", "Laporan_Perbaikan", "Presensi_PPNPN")
+
+# One version probe per process every POLL_INTERVAL seconds, however many sessions are open
+POLL_INTERVAL = 10
+
+# Changes kept per sheet for sessions that are behind; older sessions rebuild their view
+FEED_LENGTH = 50
+
+# Per sheet: {"versi", "seq", "df", "diubah"}; seq grows by one on every change seen
+_state = {}
+# Per sheet: deque of (seq, appended rows or None when rows changed in place)
+_feed = {}
+_status = {"galat": None}
+_lock = threading.Lock()
+
+def apply_to_local_state(sheet_name, df, whole_sheet=False):
+    """Feeds rows read from a sheet into the local search index and counters, as a save would.
+
+    whole_sheet=True when df is the full worksheet, so the index also drops rows that are gone.
+    """
+    if df is None or df.empty:
+        return
+    if sheet_name in SEARCH_FIELDS:
+        index_records(sheet_name, df.to_dict("records"), prune=whole_sheet)
+    if sheet_name == "Laporan_Kerusakan":
+        ticket_lifecycle.apply_rows(df_kerusakan=df)
+    elif sheet_name == "Laporan_Perbaikan":
+        ticket_lifecycle.apply_rows(df_perbaikan=df)
+    elif sheet_name == "Presensi_PPNPN":
+        attendance_recap.record_checkins(df.to_dict("records"))
+
+def _appended_rows(old, new):
+    """Rows added at the end of the sheet, or None when existing rows changed too."""
+    if old is None or len(new) < len(old) or list(old.columns) != list(new.columns):
+        return None
+    head = new.iloc[:len(old)].astype(str).reset_index(drop=True)
+    if not head.equals(old.astype(str).reset_index(drop=True)):
+        return None
+    return new.iloc[len(old):].reset_index(drop=True)
+
+def _refresh_sheet(sh, sheet_name, token, layout, summaries):
+    """Brings the shared snapshot of one sheet up to token. Returns the new DataFrame.
+
+    Another process may already have done it; otherwise only the 500-row
+    blocks whose checksums changed are read (an append touches the last one).
+    Without checksum formulas (init_meta_checksum.py not run yet) the sheet is
+    downloaded in full, as before.
+    """
+    df, snapshot_versi = shared_cache.peek(sheet_name)
+    if df is not None and snapshot_versi == token:
+        return df
+
+    if df is not None and sheet_name in layout and sheet_name in summaries:
+        meta_row, n_cols = layout[sheet_name]
+        blocks = local_blocks(df, n_cols)
+        # Matching totals under a new token are not proof of equal rows: the checksums miss
+        # some same-length edits and may not be recalculated yet, so that case is downloaded in full
+        if summaries[sheet_name] == local_summary(df, blocks):
+            return _download(sh, sheet_name, token)
+
+        remote = read_blocks(sh, meta_row)
+        differing = diff_blocks(blocks, remote)
+        if differing:
+            repaired, changed_rows, full_reload = repair(sh, sheet_name, df, n_cols, remote, differing)
+            repaired_blocks = local_blocks(repaired, n_cols)
+            # Rows beyond the checksum formulas (the grid grew) only show in the row count
+            if local_summary(repaired, repaired_blocks)[0] == summaries[sheet_name][0]:
+                repaired = shared_cache.put_sheet(sheet_name, repaired, token)
+                apply_to_local_state(sheet_name, changed_rows, whole_sheet=full_reload)
+                return repaired
+        layout.pop(sheet_name, None)
+
+    return _download(sh, sheet_name, token)
+
+def _download(sh, sheet_name, token):
+    from sheets_client import fetch_records
+
+    full = shared_cache.get_sheet(sheet_name, lambda: fetch_records(sh, sheet_name), version=token)
+    apply_to_local_state(sheet_name, full, whole_sheet=True)
+    return full
+
+def poll_once(sh, layout=None):
+    """Checks the watched sheets for changes and publishes them. Returns the checksum layout to reuse."""
+    versions, _ = read_versions(sh)
+    changed = {}
+    with _lock:
+        for sheet_name in WATCHED:
+            token = versions["*"] if "*" in versions else versions.get(sheet_name, "")
+            if sheet_name not in _state or _state[sheet_name]["versi"] != token:
+                changed[sheet_name] = token
+    if not changed:
+        return layout
+
+    # Read-only: the formulas are written by init_meta_checksum.py, never by the replicas
+    if not layout or any(sheet_name not in layout for sheet_name in changed):
+        try:
+            layout = read_layout(sh, WATCHED)
+        except Exception:
+            layout = {}
+    summaries = read_summaries(sh) if layout else {}
+
+    for sheet_name, token in changed.items():
+        df = _refresh_sheet(sh, sheet_name, token, layout, summaries)
+        with _lock:
+            old = _state.get(sheet_name)
+            seq = old["seq"] + 1 if old else 1
+            appended = _appended_rows(old["df"] if old else None, df)
+            _state[sheet_name] = {"versi": token, "seq": seq, "df": df, "diubah": datetime.now()}
+            _feed.setdefault(sheet_name, deque(maxlen=FEED_LENGTH)).append((seq, appended))
+    return layout
+
+def _run(get_spreadsheet, interval):
+    layout = None
+    while True:
+        try:
+            sh = get_spreadsheet()
+            if sh is not None:
+                layout = poll_once(sh, layout)
+            _status["galat"] = None
+        except Exception as e:
+            # Keep polling: a failed probe only delays the boards until the next one
+            _status["galat"] = str(e)
+        time.sleep(interval)
+
+def start_poller(get_spreadsheet, interval=POLL_INTERVAL):
+    thread = threading.Thread(target=_run, args=(get_spreadsheet, interval), name="live-refresh", daemon=True)
+    thread.start()
+    return thread
+
+def current(sheet_name):
+    """Returns (seq, DataFrame) of the newest rows the poller has seen, or (0, None) before its first poll."""
+    with _lock:
+        state = _state.get(sheet_name)
+    if state is None:
+        return 0, None
+    return state["seq"], state["df"]
+
+def changes_since(sheet_name, seq):
+    """Returns (current seq, rows appended since seq), or (current seq, None) when the caller must rebuild.
+
+    None means rows changed in place, or more changes happened than the feed keeps.
+    """
+    with _lock:
+        current_seq = _state[sheet_name]["seq"] if sheet_name in _state else 0
+        entries = [entry for entry in _feed.get(sheet_name, ()) if entry[0] > seq]
+    if current_seq == seq:
+        return seq, pd.DataFrame()
+    if not seq or len(entries) != current_seq - seq or any(rows is None for _, rows in entries):
+        return current_seq, None
+    return current_seq, pd.concat([rows for _, rows in entries], ignore_index=True)
+
+def status():
+    """Returns (time of the last change seen on any watched sheet or None, last poll error or None)."""
+    with _lock:
+        changed = [state["diubah"] for state in _state.values()]
+    return (max(changed) if changed else None), _status["galat"]
@@ -0,0 +1,65 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# Local state shared by the app processes on this host (search index, counters, ...)
+LOCAL_DIR = "data_lokal"
+DB_PATH = os.path.join(LOCAL_DIR, "sirumat.db")
+
+def connect(autocommit=False):
+    """Opens the local SQLite database. WAL lets several Streamlit processes read while one writes.
+
+    autocommit=True leaves transactions to the caller, for use with write_transaction().
+    """
+    os.makedirs(LOCAL_DIR, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    if autocommit:
+        conn.isolation_level = None
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+@contextmanager
+def write_transaction(conn):
+    """Runs the block in one BEGIN IMMEDIATE transaction on an autocommit connection.
+
+    The write lock is taken before the first SELECT, so read-then-write updates
+    (counters) from several processes run one after the other instead of both
+    acting on the same old value.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+SETTINGS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pengaturan (
+    kunci TEXT PRIMARY KEY,
+    nilai TEXT NOT NULL
+);
+"""
+
+def get_setting(key, default=None):
+    conn = connect()
+    try:
+        conn.executescript(SETTINGS_SCHEMA)
+        row = conn.execute("SELECT nilai FROM pengaturan WHERE kunci = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else default
+
+def set_setting(key, value):
+    conn = connect()
+    try:
+        conn.executescript(SETTINGS_SCHEMA)
+        with conn:
+            conn.execute(
+                "INSERT INTO pengaturan (kunci, nilai) VALUES (?, ?) "
+                "ON CONFLICT (kunci) DO UPDATE SET nilai = excluded.nilai",
+                (key, str(value))
+            )
+    finally:
+        conn.close()
@@ -2,15 +2,31 @@ import streamlit as st
 import pandas as pd
 import os
 import io
-import gspread
 import base64
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import archive_store
+import attendance_recap
+import bulk_import
+import live_refresh
+import search_index
+import shared_cache
+import ticket_ids
+import ticket_lifecycle
+import sheet_versions
+import sheets_client
 
 # Set page configuration
 st.set_page_config(page_title="Si-Rumat", layout="wide")
 
+# Auth, open and version probe start in the background as soon as a process runs the app
+# (under serve.py before the first visitor arrives); open_spreadsheet() then only waits for it
+sheets_client.open_in_background(sheets_client.secrets_service_account())
+
 # Constants
 UPLOAD_DIR = "galeri_bukti"
+# Open boards rerun only their live fragments this often (the poller itself runs every live_refresh.POLL_INTERVAL)
+LIVE_REFRESH_SECONDS = 15
 
 # Helper functions
 def ensure_upload_dir():
@@ -33,25 +49,34 @@ def save_uploaded_file(uploaded_file):
     
     return filepath
 
+# Table photos are shown as small thumbnails; caching those instead of the full
+# uploads keeps the cache at a few MB per process
+THUMBNAIL_SIZE = (160, 160)
+
+@st.cache_data(max_entries=300, ttl=timedelta(hours=6), show_spinner=False)
 def get_image_data_url(file_path):
-    """Reads a local image file and returns a Base64 Data URI."""
+    """Reads a local image file and returns a Base64 Data URI of its thumbnail.
+
+    Cached across reruns and sessions: uploaded files get a timestamped name and
+    never change, so live refreshes only encode the photos of new rows.
+    """
     if not file_path or file_path == "-" or not os.path.exists(file_path):
         return None
     try:
-        with open(file_path, "rb") as f:
-            data = f.read()
-        encoded = base64.b64encode(data).decode()
-        # Determine mime type based on extension
-        ext = os.path.splitext(file_path)[1].lower()
-        mime = "image/png" if ext == ".png" else "image/jpeg"
-        return f"data:{mime};base64,{encoded}"
+        from PIL import Image
+
+        with Image.open(file_path) as img:
+            img.thumbnail(THUMBNAIL_SIZE)
+            buffer = io.BytesIO()
+            img.convert("RGB").save(buffer, format="JPEG", quality=80)
+        encoded = base64.b64encode(buffer.getvalue()).decode()
+        return f"data:image/jpeg;base64,{encoded}"
     except Exception:
         return None
 
 def generate_ticket_id():
-    """Generates a unique ticket ID based on timestamp."""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    return f"TKT-{timestamp}"
+    """Generates a unique, time-sortable ticket ID (see ticket_ids)."""
+    return ticket_ids.next_ticket_id()
 
 def update_ticket_status(ticket_id, new_status):
     """Updates the status of a specific ticket in Laporan_Kerusakan."""
@@ -59,22 +84,21 @@ def update_ticket_status(ticket_id, new_status):
     if conn:
         try:
             ws = conn.worksheet("Laporan_Kerusakan")
-            # Find the cell with the ticket ID
-            cell = ws.find(ticket_id)
-            if cell:
-                # Status is in the column after Ticket ID (based on our upgrade script)
-                # But safer to find header index. For now, assuming it's the last column or we search for it.
-                # Let's find 'Status' column index
-                headers = ws.row_values(1)
-                if "Status" in headers:
+            headers = ws.row_values(1)
+            if "Tiket ID" in headers and "Status" in headers:
+                # Only match the Tiket ID column, so free text that happens to contain the ID is never hit
+                cell = ws.find(ticket_id, in_column=headers.index("Tiket ID") + 1)
+                if cell:
                     status_col = headers.index("Status") + 1
                     ws.update_cell(cell.row, status_col, new_status)
+                    mark_sheet_changed(conn, "Laporan_Kerusakan")
                     return True
         except Exception as e:
             st.error(f"Failed to update ticket status: {e}")
     return False
 
 def to_excel(df):
+    # pandas imports openpyxl here, so it is only loaded when an export is requested
     output = io.BytesIO()
     with pd.ExcelWriter(output, engine='openpyxl') as writer:
         df.to_excel(writer, index=False, sheet_name='Sheet1')
@@ -83,50 +107,183 @@ def to_excel(df):
 # Sidebar
 with st.sidebar:
     st.title("Menu")
-    menu = st.radio("Pilih Menu", ["Beranda", "Kerumahtanggaan", "Manajemen Inventaris", "Absensi PPNPN"])
+    menu = st.radio("Pilih Menu", ["Beranda", "Kerumahtanggaan", "Manajemen Inventaris", "Absensi PPNPN", "Import Massal"])
     st.divider()
+    live_mode = st.toggle("Pembaruan Otomatis", value=True, help="Tabel dan ringkasan diperbarui sendiri saat ada data baru")
     debug_mode = st.checkbox("Debug Mode")
 
 # Google Sheets Connection Helper
-def get_connection():
-    try:
-        # Try loading from Streamlit secrets first (for Cloud)
-        if "gcp_service_account" in st.secrets:
-            service_account_info = st.secrets["gcp_service_account"]
-            gc = gspread.service_account_from_dict(service_account_info)
-        # Fallback to local file (for local development)
-        elif os.path.exists('service_account.json'):
-            gc = gspread.service_account(filename='service_account.json')
-        else:
-            st.error("Missing Google Sheets credentials. Please configure secrets or add service_account.json.")
-            return None
-
-        try:
-            sh = gc.open("database_sirumat")
-        except gspread.SpreadsheetNotFound:
-            sh = gc.open("Database_SiRumat")
+@st.cache_resource(show_spinner=False)
+def open_spreadsheet():
+    # Authenticated once per server process and shared by all sessions
+    sh = sheets_client.background_spreadsheet()
+    if sh is not None:
         return sh
+    # Try loading from Streamlit secrets first (for Cloud); sheets_client falls back to service_account.json
+    return sheets_client.open_spreadsheet(sheets_client.secrets_service_account())
+
+def get_connection(show_errors=True):
+    try:
+        return open_spreadsheet()
+    except FileNotFoundError as e:
+        if show_errors: st.error(str(e))
+        return None
     except Exception as e:
-        st.error(f"Error connecting to Google Sheets: {e}")
+        if show_errors: st.error(f"Error connecting to Google Sheets: {e}")
         return None
 
-def load_data(sheet_name):
+@st.cache_resource(show_spinner=False)
+def start_live_refresh():
+    # One poller thread per server process, shared by every open session
+    sh = open_spreadsheet()
+    return live_refresh.start_poller(lambda: sh)
+
+def live_fragment(render):
+    """Runs render() as a fragment that reruns on its own while live refresh is on."""
+    run_every = None
+    if live_mode:
+        try:
+            start_live_refresh()
+            run_every = LIVE_REFRESH_SECONDS
+        except Exception as e:
+            if debug_mode: st.warning(f"DEBUG: Live refresh unavailable: {e}")
+    st.fragment(render, run_every=run_every)()
+
+def live_caption():
+    terakhir, galat = live_refresh.status()
+    if not live_mode:
+        return
+    if galat:
+        st.caption(f"Pembaruan otomatis tertunda: {galat}")
+    elif terakhir:
+        st.caption(f"Pembaruan otomatis tiap {LIVE_REFRESH_SECONDS} detik · perubahan terakhir {terakhir.strftime('%H:%M:%S')}")
+
+def fetch_sheet(sheet_name):
+    """Downloads a worksheet from Google Sheets. Returns None when there is no connection."""
     sh = get_connection()
     if sh is None:
-        return pd.DataFrame()
-        
+        return None
+    return sheets_client.fetch_records(sh, sheet_name)
+
+def load_data(sheet_name):
+    # Served from the snapshot shared by all server processes. A cheap version probe
+    # comes first; the full get_all_records only runs when the worksheet changed.
     try:
-        worksheet = sh.worksheet(sheet_name)
-        data = worksheet.get_all_records()
-        return pd.DataFrame(data)
-    except gspread.WorksheetNotFound:
-        return pd.DataFrame()
+        try:
+            versi = sheet_versions.sheet_version(sheet_name, lambda: get_connection(show_errors=False))
+        except Exception:
+            # A failed probe only costs freshness tracking; fall back to the plain TTL
+            versi = None
+        df = shared_cache.get_sheet(sheet_name, lambda: fetch_sheet(sheet_name), version=versi)
+        return df if df is not None else pd.DataFrame()
     except Exception as e:
         st.error(f"Error loading data from {sheet_name}: {e}")
         return pd.DataFrame()
 
+def load_history(sheet_name, start=None, end=None, columns=None, df_hot=None):
+    """Loads a sheet's hot rows from Sheets plus its archived Parquet rows within the date range."""
+    if df_hot is None:
+        df_hot = load_data(sheet_name)
+    date_col = archive_store.DATE_COLUMNS.get(sheet_name)
+    if date_col and not df_hot.empty and date_col in df_hot.columns:
+        tanggal = df_hot[date_col].astype(str)
+        mask = pd.Series(True, index=df_hot.index)
+        if start:
+            mask &= tanggal >= str(start)
+        if end:
+            mask &= tanggal <= f"{end} 23:59:59"
+        df_hot = df_hot[mask]
+    if columns and not df_hot.empty:
+        df_hot = df_hot[[c for c in columns if c in df_hot.columns]]
+
+    df_arsip = archive_store.read_archive(sheet_name, start, end, columns)
+    if df_arsip.empty:
+        return df_hot
+    return pd.concat([df_arsip, df_hot], ignore_index=True)
+
+HISTORY_PAGE_SIZE = 25
+
+def history_filters(sheet_name, key, with_status=False):
+    """Renders the history filter row. Returns (filters for search_index.query_rows, page number)."""
+    c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+    with c1:
+        mulai, sampai = date_range_input(f"rentang_{key}")
+    status = None
+    if with_status:
+        status = c2.selectbox("Status", ["Semua", "Pending", "Selesai"], key=f"status_{key}")
+    lokasi = c3.selectbox(
+        "Lokasi", ["Semua"] + search_index.distinct_values(sheet_name, "lokasi"), key=f"lokasi_{key}"
+    )
+    halaman = c4.number_input("Halaman", min_value=1, value=1, key=f"halaman_{key}")
+    filters = {
+        "start": mulai,
+        "end": sampai,
+        "status": None if status in (None, "Semua") else status,
+        "lokasi": None if lokasi == "Semua" else lokasi,
+    }
+    return filters, halaman
+
+def page_caption(total_rows, page):
+    jumlah_halaman = max(1, (total_rows + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE)
+    return f"{total_rows} baris sesuai filter · halaman {page} dari {jumlah_halaman}"
+
+def excel_download(key, signature, build_df, file_name):
+    """Two-step Excel export: the file is only built (and openpyxl loaded) when asked for.
+
+    signature identifies what the prepared file contains; when it changes
+    (e.g. other filters), the stale file is no longer offered.
+    """
+    state_key = f"excel_{key}"
+    if st.button("Siapkan Excel", key=f"siapkan_{key}"):
+        st.session_state[state_key] = (signature, to_excel(build_df()))
+
+    prepared = st.session_state.get(state_key)
+    if prepared and prepared[0] == signature:
+        st.download_button(
+            label="Download Excel",
+            data=prepared[1],
+            file_name=file_name,
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key=f"download_{key}"
+        )
+
+def export_excel_button(sheet_name, filters, key):
+    """Exports a history view from both storage tiers, with the view's filters."""
+    def build():
+        df = load_history(sheet_name, filters["start"], filters["end"])
+        if not df.empty:
+            if filters["status"] and "Status" in df.columns:
+                df = df[df["Status"] == filters["status"]]
+            if filters["lokasi"] and "Lokasi" in df.columns:
+                df = df[df["Lokasi"] == filters["lokasi"]]
+        return df
+
+    excel_download(
+        key,
+        tuple(sorted((k, str(v)) for k, v in filters.items())),
+        build,
+        f"{sheet_name}_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
+    )
+
+def date_range_input(key):
+    """Date range picker for history views; defaults to the last 30 days."""
+    today = datetime.now().date()
+    rentang = st.date_input("Rentang Tanggal", value=(today - timedelta(days=30), today), key=key)
+    if isinstance(rentang, (list, tuple)) and len(rentang) == 2:
+        return rentang[0], rentang[1]
+    # Only the start date is picked while the user is still selecting
+    return (rentang[0] if isinstance(rentang, (list, tuple)) else rentang), today
+
 import time
 
+def mark_sheet_changed(sh, sheet_name):
+    """Publishes a write: bumps the sheet's version token and drops local snapshots."""
+    shared_cache.invalidate(sheet_name)
+    try:
+        sheet_versions.bump_version(sh, sheet_name)
+    except Exception as e:
+        if debug_mode: st.warning(f"DEBUG: Version bump failed for {sheet_name}: {e}")
+
 def save_data(sheet_name, new_data):
     if debug_mode:
         st.write(f"DEBUG: Starting save to {sheet_name}...")
@@ -145,12 +302,26 @@ def save_data(sheet_name, new_data):
         worksheet.append_row(new_data.values.tolist()[0])
         
         if debug_mode: st.success("DEBUG: append_row completed successfully!")
+        mark_sheet_changed(sh, sheet_name)
+        index_for_search(sheet_name, new_data)
         return True
     except Exception as e:
         st.error(f"Error saving data to {sheet_name}: {e}")
         if debug_mode: st.error(f"DEBUG: Exception details: {e}")
         return False
 
+def index_for_search(sheet_name, df, whole_sheet=False):
+    """Keeps the local full-text index in step with the sheet; never blocks the caller.
+
+    whole_sheet=True when df is the full hot worksheet, so deleted or re-keyed rows leave the history.
+    """
+    if sheet_name not in search_index.SEARCH_FIELDS or df.empty:
+        return
+    try:
+        search_index.index_records(sheet_name, df.to_dict("records"), prune=whole_sheet)
+    except Exception as e:
+        if debug_mode: st.warning(f"DEBUG: Search index update failed: {e}")
+
 # Main content
 st.title("Si-Rumat")
 
@@ -161,28 +332,72 @@ if menu == "Beranda":
     df_kerusakan = load_data("Laporan_Kerusakan")
     df_perbaikan = load_data("Laporan_Perbaikan")
 
-    # Calculate metrics
-    total_kerusakan = len(df_kerusakan) if not df_kerusakan.empty else 0
-    total_perbaikan = len(df_perbaikan) if not df_perbaikan.empty else 0
+    # Calculate metrics (archived rows are counted from Parquet metadata)
+    total_kerusakan = len(df_kerusakan) + archive_store.count_archived("Laporan_Kerusakan")
+    total_perbaikan = len(df_perbaikan) + archive_store.count_archived("Laporan_Perbaikan")
 
     # Display metrics
-    col1, col2 = st.columns(2)
+    # Ticket lifecycle metrics come from the local Tiket ID index, kept in step incrementally
+    ticket_lifecycle.sync(df_kerusakan, df_perbaikan, lambda: (
+        archive_store.read_archive("Laporan_Kerusakan"), archive_store.read_archive("Laporan_Perbaikan")
+    ))
+    tiket_terbuka, _, mttr_jam = ticket_lifecycle.summary()
+
+    col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Laporan Kerusakan", total_kerusakan)
     col2.metric("Total Perbaikan Selesai", total_perbaikan)
+    col3.metric("Tiket Terbuka", tiket_terbuka)
+    col4.metric("Rata-rata Waktu Perbaikan", f"{mttr_jam:.1f} jam" if mttr_jam is not None else "-")
+
+    st.divider()
+
+    st.subheader("Backlog Tiket per Lokasi")
+    df_backlog = ticket_lifecycle.backlog_per_lokasi()
+    if not df_backlog.empty:
+        c1, c2 = st.columns([2, 1])
+        c1.dataframe(df_backlog, use_container_width=True, hide_index=True)
+        c2.dataframe(ticket_lifecycle.open_ageing(), use_container_width=True, hide_index=True)
+    else:
+        st.info("Belum ada data tiket untuk ditampilkan.")
 
     st.divider()
 
     # Visualization
     st.subheader("Statistik Kerusakan per Lokasi")
-    if not df_kerusakan.empty and "Lokasi" in df_kerusakan.columns:
-        lokasi_counts = df_kerusakan["Lokasi"].value_counts()
+    df_lokasi = pd.concat(
+        [archive_store.read_archive("Laporan_Kerusakan", columns=["Lokasi"]), df_kerusakan],
+        ignore_index=True
+    )
+    if not df_lokasi.empty and "Lokasi" in df_lokasi.columns:
+        lokasi_counts = df_lokasi["Lokasi"].value_counts()
         st.bar_chart(lokasi_counts)
     else:
         st.info("Belum ada data kerusakan untuk ditampilkan.")
 
 elif menu == "Kerumahtanggaan":
     st.header("Kerumahtanggaan")
-    tab1, tab2 = st.tabs(["Laporan Kerusakan", "Laporan Perbaikan"])
+    tab1, tab2, tab3 = st.tabs(["Laporan Kerusakan", "Laporan Perbaikan", "Pencarian"])
+
+    # Hot rows are loaded once per rerun and shared by the tabs below.
+    # Rows appended, edited or deleted by other sessions are picked up by the search index here.
+    df_kerusakan_hot = load_data("Laporan_Kerusakan")
+    df_perbaikan_hot = load_data("Laporan_Perbaikan")
+    index_for_search("Laporan_Kerusakan", df_kerusakan_hot, whole_sheet=True)
+    index_for_search("Laporan_Perbaikan", df_perbaikan_hot, whole_sheet=True)
+
+    def ringkasan_kerumahtanggaan():
+        # Counted on the local index and ticket counters, which the poller keeps current
+        hari_ini = datetime.now().date()
+        terbuka, _, _ = ticket_lifecycle.summary()
+        laporan_hari_ini, _ = search_index.query_rows("Laporan_Kerusakan", start=hari_ini, end=hari_ini, page_size=0)
+        perbaikan_hari_ini, _ = search_index.query_rows("Laporan_Perbaikan", start=hari_ini, end=hari_ini, page_size=0)
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Tiket Terbuka", terbuka)
+        m2.metric("Laporan Hari Ini", laporan_hari_ini)
+        m3.metric("Perbaikan Hari Ini", perbaikan_hari_ini)
+        live_caption()
+
+    live_fragment(ringkasan_kerumahtanggaan)
 
     with tab1:
         st.subheader("Laporan Kerusakan")
@@ -214,6 +429,7 @@ elif menu == "Kerumahtanggaan":
                     })
                     
                     if save_data("Laporan_Kerusakan", data):
+                        ticket_lifecycle.apply_rows(df_kerusakan=data)
                         st.success(f"Laporan berhasil dikirim! Tiket ID: {tiket_id}")
                         if not debug_mode:
                             time.sleep(1)
@@ -223,41 +439,44 @@ elif menu == "Kerumahtanggaan":
         
         st.divider()
         st.subheader("Riwayat Laporan")
-        df_kerusakan = load_data("Laporan_Kerusakan")
-        if not df_kerusakan.empty:
-            # Prepare display dataframe with images
-            df_display = df_kerusakan.copy()
-            if "Bukti Foto" in df_display.columns:
-                df_display["Bukti Foto"] = df_display["Bukti Foto"].apply(get_image_data_url)
 
-            st.dataframe(
-                df_display, 
-                use_container_width=True,
-                column_config={
-                    "Bukti Foto": st.column_config.ImageColumn("Bukti Foto", help="Bukti Foto Laporan"),
-                    "Status": st.column_config.SelectboxColumn(
-                        "Status",
-                        options=["Pending", "Selesai"],
-                        help="Status Pengerjaan",
-                        disabled=True # Read-only in this view
-                    )
-                }
+        def riwayat_kerusakan():
+            filter_kerusakan, halaman = history_filters("Laporan_Kerusakan", "kerusakan", with_status=True)
+            total_laporan, rows_laporan = search_index.query_rows(
+                "Laporan_Kerusakan", **filter_kerusakan, page=halaman, page_size=HISTORY_PAGE_SIZE
             )
+            if rows_laporan:
+                # Only the visible page is materialized, so only its images are encoded
+                df_display = pd.DataFrame(rows_laporan)
+                if "Bukti Foto" in df_display.columns:
+                    df_display["Bukti Foto"] = df_display["Bukti Foto"].apply(get_image_data_url)
+
+                st.caption(page_caption(total_laporan, halaman))
+                st.dataframe(
+                    df_display, 
+                    use_container_width=True,
+                    column_config={
+                        "Bukti Foto": st.column_config.ImageColumn("Bukti Foto", help="Bukti Foto Laporan"),
+                        "Status": st.column_config.SelectboxColumn(
+                            "Status",
+                            options=["Pending", "Selesai"],
+                            help="Status Pengerjaan",
+                            disabled=True # Read-only in this view
+                        )
+                    }
+                )
             
-            st.download_button(
-                label="Download Excel",
-                data=to_excel(df_kerusakan),
-                file_name=f"Laporan_Kerusakan_{datetime.now().strftime('%Y-%m-%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-        else:
-            st.info("Belum ada data laporan.")
+                export_excel_button("Laporan_Kerusakan", filter_kerusakan, "kerusakan")
+            else:
+                st.info("Belum ada data laporan sesuai filter." if total_laporan == 0 else "Halaman melebihi jumlah data.")
+
+        live_fragment(riwayat_kerusakan)
 
     with tab2:
         st.subheader("Laporan Perbaikan")
         
         # Load Pending Tickets
-        df_kerusakan = load_data("Laporan_Kerusakan")
+        df_kerusakan = df_kerusakan_hot
         pending_tickets = []
         if not df_kerusakan.empty and "Status" in df_kerusakan.columns:
             pending_tickets = df_kerusakan[df_kerusakan["Status"] == "Pending"]["Tiket ID"].tolist()
@@ -298,6 +517,7 @@ elif menu == "Kerumahtanggaan":
                     })
                     
                     if save_data("Laporan_Perbaikan", data):
+                        ticket_lifecycle.apply_rows(df_perbaikan=data)
                         # Update status if it's a ticket
                         if selected_ticket != "Non-Tiket (Manual)":
                             update_ticket_status(selected_ticket, "Selesai")
@@ -313,29 +533,56 @@ elif menu == "Kerumahtanggaan":
         
         st.divider()
         st.subheader("Riwayat Perbaikan")
-        df_perbaikan = load_data("Laporan_Perbaikan")
-        if not df_perbaikan.empty:
-            # Prepare display dataframe with images
-            df_display = df_perbaikan.copy()
-            if "Bukti Foto" in df_display.columns:
-                df_display["Bukti Foto"] = df_display["Bukti Foto"].apply(get_image_data_url)
 
-            st.dataframe(
-                df_display, 
-                use_container_width=True,
-                column_config={
-                    "Bukti Foto": st.column_config.ImageColumn("Bukti Foto", help="Bukti Foto Perbaikan")
-                }
+        def riwayat_perbaikan():
+            filter_perbaikan, halaman = history_filters("Laporan_Perbaikan", "perbaikan")
+            total_perbaikan, rows_perbaikan = search_index.query_rows(
+                "Laporan_Perbaikan", **filter_perbaikan, page=halaman, page_size=HISTORY_PAGE_SIZE
             )
+            if rows_perbaikan:
+                # Only the visible page is materialized, so only its images are encoded
+                df_display = pd.DataFrame(rows_perbaikan)
+                if "Bukti Foto" in df_display.columns:
+                    df_display["Bukti Foto"] = df_display["Bukti Foto"].apply(get_image_data_url)
+
+                st.caption(page_caption(total_perbaikan, halaman))
+                st.dataframe(
+                    df_display, 
+                    use_container_width=True,
+                    column_config={
+                        "Bukti Foto": st.column_config.ImageColumn("Bukti Foto", help="Bukti Foto Perbaikan")
+                    }
+                )
             
-            st.download_button(
-                label="Download Excel",
-                data=to_excel(df_perbaikan),
-                file_name=f"Laporan_Perbaikan_{datetime.now().strftime('%Y-%m-%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                export_excel_button("Laporan_Perbaikan", filter_perbaikan, "perbaikan")
+            else:
+                st.info("Belum ada data perbaikan sesuai filter." if total_perbaikan == 0 else "Halaman melebihi jumlah data.")
+
+        live_fragment(riwayat_perbaikan)
+
+    with tab3:
+        st.subheader("Pencarian Laporan")
+        c1, c2 = st.columns([3, 1])
+        kata_kunci = c1.text_input("Cari Kendala, Tindakan, Lokasi atau Nama")
+        sumber = c2.selectbox("Sumber", ["Semua", "Laporan_Kerusakan", "Laporan_Perbaikan"])
+
+        if kata_kunci:
+            per_halaman = 10
+            halaman = st.number_input("Halaman", min_value=1, value=1)
+            total_hasil, hasil = search_index.search(
+                kata_kunci, None if sumber == "Semua" else sumber, page=halaman, page_size=per_halaman
             )
-        else:
-            st.info("Belum ada data perbaikan.")
+            if total_hasil == 0:
+                st.info("Tidak ada laporan yang cocok.")
+            else:
+                jumlah_halaman = (total_hasil + per_halaman - 1) // per_halaman
+                st.caption(f"{total_hasil} hasil ditemukan (halaman {halaman} dari {jumlah_halaman})")
+                for item in hasil:
+                    row = item["data"]
+                    judul = row["Tiket ID"] if row.get("Tiket ID") not in (None, "", "-") else item["sheet"]
+                    st.markdown(f"**{judul}** · {row.get('Tanggal', '')} · {row.get('Lokasi', '')}")
+                    st.markdown(item["snippet"])
+                    st.caption(item["sheet"].replace("_", " "))
 
 
 
@@ -425,6 +672,7 @@ elif menu == "Manajemen Inventaris":
                                 else:
                                     ws.update_cell(cell.row, 3, new_stok)
                                     ws.update_cell(cell.row, 6, datetime.now().strftime("%Y-%m-%d %H:%M:%S")) # Update timestamp
+                                    mark_sheet_changed(conn, "Inventaris_Barang")
                                     st.success(f"Stok {selected_barang} berhasil diupdate menjadi {new_stok}!")
                                     time.sleep(1)
                                     st.rerun()
@@ -535,6 +783,7 @@ elif menu == "Manajemen Inventaris":
                                 else:
                                     ws.update_cell(cell.row, 3, new_stok)
                                     ws.update_cell(cell.row, 6, datetime.now().strftime("%Y-%m-%d %H:%M:%S")) # Update timestamp
+                                    mark_sheet_changed(conn, "Inventaris_Barang")
                                     st.success(f"Stok {selected_barang} berhasil diupdate menjadi {new_stok}!")
                                     time.sleep(1)
                                     st.rerun()
@@ -600,6 +849,7 @@ elif menu == "Absensi PPNPN":
             })
             
             if save_data("Presensi_PPNPN", data):
+                attendance_recap.record_checkins(data.to_dict("records"))
                 st.success(f"Absensi {nama_pegawai} berhasil dikirim!")
                 if not debug_mode:
                     time.sleep(1)
@@ -611,20 +861,55 @@ elif menu == "Absensi PPNPN":
     st.subheader("Riwayat Absensi Hari Ini")
     
     df_absensi = load_data("Presensi_PPNPN")
-    if not df_absensi.empty:
-        # Filter for today
+    # Check-ins from other sessions and replicas reach the monthly counters here
+    attendance_recap.sync(df_absensi, lambda: archive_store.read_archive("Presensi_PPNPN"))
+
+    def absensi_tampilan(df, tanggal):
+        """Check-ins of one day (YYYY-MM-DD) with their photos encoded for display."""
+        if df.empty or "Waktu" not in df.columns:
+            return pd.DataFrame()
+        df_hari = df[df["Waktu"].astype(str).str.split(" ").str[0] == tanggal].copy()
+        if "Bukti Foto" in df_hari.columns:
+            df_hari["Bukti Foto"] = df_hari["Bukti Foto"].apply(get_image_data_url)
+        return df_hari.reset_index(drop=True)
+
+    def terakhir_absen(df):
+        """Time of the newest check-in as its YYYY-MM-DD HH:MM:SS text, "" when there is none."""
+        if df.empty or "Waktu" not in df.columns:
+            return ""
+        return df["Waktu"].astype(str).max()
+
+    def absensi_hari_ini():
         today_str = datetime.now().strftime("%Y-%m-%d")
-        # Ensure 'Waktu' column is treated as string/datetime for filtering
-        # Assuming format is YYYY-MM-DD HH:MM:SS
-        df_absensi["Tanggal_Only"] = df_absensi["Waktu"].astype(str).str.split(" ").str[0]
-        df_today = df_absensi[df_absensi["Tanggal_Only"] == today_str].drop(columns=["Tanggal_Only"])
-        
-        if not df_today.empty:
-            # Prepare display dataframe with images
-            df_display = df_today.copy()
-            if "Bukti Foto" in df_display.columns:
-                df_display["Bukti Foto"] = df_display["Bukti Foto"].apply(get_image_data_url)
+        seq, df_live = live_refresh.current("Presensi_PPNPN")
+        if df_live is None or terakhir_absen(df_absensi) > terakhir_absen(df_live):
+            # Live refresh off, before the poller's first round, or the poller has not yet
+            # seen a check-in this page just saved (save_data already refreshed df_absensi)
+            seq, df_live = 0, df_absensi
+
+        # The session keeps its rendered table; only check-ins added since are filtered and encoded
+        tampilan = st.session_state.get("absensi_hari_ini")
+        baru = None
+        if seq and tampilan and tampilan["tanggal"] == today_str:
+            _, baru = live_refresh.changes_since("Presensi_PPNPN", tampilan["seq"])
+        if baru is None:
+            df_display = absensi_tampilan(df_live, today_str)
+        elif baru.empty:
+            df_display = tampilan["df"]
+        else:
+            df_display = pd.concat([tampilan["df"], absensi_tampilan(baru, today_str)], ignore_index=True)
+        st.session_state["absensi_hari_ini"] = {"seq": seq, "tanggal": today_str, "df": df_display}
 
+        if df_live.empty:
+            st.info("Belum ada data absensi.")
+        elif df_display.empty:
+            st.info("Belum ada data absensi hari ini.")
+        else:
+            jumlah = df_display["Status"].value_counts() if "Status" in df_display.columns else {}
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Hadir", int(jumlah.get("Hadir", 0)))
+            m2.metric("Izin", int(jumlah.get("Izin", 0)))
+            m3.metric("Sakit", int(jumlah.get("Sakit", 0)))
             st.dataframe(
                 df_display,
                 use_container_width=True,
@@ -632,7 +917,106 @@ elif menu == "Absensi PPNPN":
                     "Bukti Foto": st.column_config.ImageColumn("Bukti Foto", help="Foto Selfie")
                 }
             )
-        else:
-            st.info("Belum ada data absensi hari ini.")
+        live_caption()
+
+    live_fragment(absensi_hari_ini)
+
+    st.divider()
+    st.subheader("Rekap Bulanan")
+    daftar_bulan = attendance_recap.months()
+    if daftar_bulan:
+        bulan = st.selectbox("Bulan", daftar_bulan)
+        df_rekap = attendance_recap.monthly_recap(bulan)
+        st.dataframe(df_rekap, use_container_width=True, hide_index=True)
+        excel_download("rekap_presensi", bulan, lambda: df_rekap, f"Rekap_Presensi_{bulan}.xlsx")
     else:
-        st.info("Belum ada data absensi.")
+        st.info("Belum ada data rekap absensi.")
+
+elif menu == "Import Massal":
+    st.header("Import Massal dari Excel/CSV")
+
+    target = st.selectbox("Sheet Tujuan", list(bulk_import.TARGETS))
+    spec = bulk_import.TARGETS[target]
+    st.caption(f"Kolom wajib: {', '.join(spec['required'])}. Kolom opsional (diisi otomatis): {', '.join(spec['defaults'])}.")
+    if spec["upsert_key"]:
+        st.caption(f"Baris dengan {spec['upsert_key']} yang sudah ada akan diperbarui, sisanya ditambahkan.")
+
+    uploaded_import = st.file_uploader("Upload File", type=["xlsx", "csv"])
+
+    if uploaded_import and st.button("Mulai Import"):
+        conn = get_connection()
+        if conn:
+            try:
+                ws = conn.worksheet(target)
+                sheet_headers = ws.row_values(1)
+                row_index = bulk_import.row_index_for(ws, sheet_headers, spec["upsert_key"]) if spec["upsert_key"] else None
+
+                total_rows = bulk_import.estimate_rows(uploaded_import)
+                progress = st.progress(0.0, text="Memulai import...")
+                errors = []
+                processed = updated = appended = 0
+                header_problems = []
+
+                written = False
+                try:
+                    for first_row, chunk in bulk_import.iter_chunks(uploaded_import):
+                        if first_row == 2:
+                            header_problems = bulk_import.check_headers(target, list(chunk.columns), sheet_headers)
+                            if header_problems:
+                                for problem in header_problems:
+                                    st.error(problem)
+                                break
+
+                        valid, chunk_errors = bulk_import.validate_chunk(target, first_row, chunk)
+                        errors.extend(chunk_errors)
+                        if valid:
+                            try:
+                                written = True
+                                if row_index is not None:
+                                    n_updated, n_appended = bulk_import.upsert_rows(
+                                        ws, sheet_headers, valid, spec["upsert_key"], row_index
+                                    )
+                                else:
+                                    ws.append_rows(bulk_import.to_sheet_rows(valid, sheet_headers))
+                                    n_updated, n_appended = 0, len(valid)
+                                updated += n_updated
+                                appended += n_appended
+
+                                df_written = pd.DataFrame(valid)
+                                index_for_search(target, df_written)
+                                if target == "Laporan_Kerusakan":
+                                    ticket_lifecycle.apply_rows(df_kerusakan=df_written)
+                                elif target == "Laporan_Perbaikan":
+                                    ticket_lifecycle.apply_rows(df_perbaikan=df_written)
+                            except Exception as e:
+                                errors.extend(
+                                    {"Baris": first_row + i, "Kolom": "-", "Pesan": f"Gagal ditulis ke sheet: {e}"}
+                                    for i in range(len(chunk))
+                                )
+
+                        processed += len(chunk)
+                        progress.progress(
+                            min(processed / total_rows, 1.0),
+                            text=f"{processed} dari ~{total_rows} baris diproses"
+                        )
+                finally:
+                    # Also when a chunk fails part-way: rows already written must reach other replicas
+                    if written:
+                        mark_sheet_changed(conn, target)
+
+                if not header_problems:
+                    st.success(f"Import selesai: {appended} baris ditambahkan, {updated} baris diperbarui, "
+                               f"{len({e['Baris'] for e in errors})} baris gagal.")
+
+                if errors:
+                    df_errors = pd.DataFrame(errors)
+                    st.subheader("Laporan Kesalahan")
+                    st.dataframe(df_errors, use_container_width=True, hide_index=True)
+                    st.download_button(
+                        label="Download Laporan Kesalahan (CSV)",
+                        data=df_errors.to_csv(index=False).encode("utf-8"),
+                        file_name=f"Kesalahan_Import_{target}_{datetime.now().strftime('%Y-%m-%d')}.csv",
+                        mime="text/csv"
+                    )
+            except Exception as e:
+                st.error(f"Gagal import: {e}")
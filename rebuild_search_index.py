@@ -0,0 +1,42 @@
+import gspread
+import os
+import pandas as pd
+
+from archive_store import read_archive
+from search_index import SEARCH_FIELDS, index_records
+
+print("Rebuilding local search index...")
+
+if not os.path.exists('service_account.json'):
+    print("ERROR: service_account.json not found!")
+    exit()
+
+try:
+    gc = gspread.service_account(filename='service_account.json')
+    try:
+        sh = gc.open("database_sirumat")
+    except gspread.SpreadsheetNotFound:
+        sh = gc.open("Database_SiRumat")
+
+    print(f"Connected to: {sh.title}")
+
+    for sheet_name in SEARCH_FIELDS:
+        try:
+            # Archived rows first, then the hot worksheet; unchanged rows are skipped and
+            # documents of rows no longer in the worksheet are dropped
+            df_arsip = read_archive(sheet_name)
+            changed = index_records(sheet_name, df_arsip.to_dict("records"), archived=True)
+            print(f"{sheet_name}: {changed} archived rows indexed.")
+
+            df_hot = pd.DataFrame(sh.worksheet(sheet_name).get_all_records())
+            changed = index_records(sheet_name, df_hot.to_dict("records"), prune=True)
+            print(f"{sheet_name}: {changed} worksheet rows indexed.")
+        except gspread.WorksheetNotFound:
+            print(f"{sheet_name}: worksheet not found, skipped.")
+        except Exception as e:
+            print(f"Error indexing {sheet_name}: {e}")
+
+    print("Index Rebuild Complete!")
+
+except Exception as e:
+    print(f"CRITICAL ERROR: {e}")
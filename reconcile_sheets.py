@@ -0,0 +1,68 @@
+import gspread
+import os
+
+import shared_cache
+from block_checksum import diff_blocks, ensure_formulas, local_blocks, local_summary, read_blocks, read_summaries, repair
+from live_refresh import apply_to_local_state
+from sheet_versions import META_SHEET, read_versions
+
+# Compares the local sheet snapshots with Google Sheets block by block and
+# re-downloads only the blocks that drifted.
+print("Reconciling local snapshots with Google Sheets...")
+
+if not os.path.exists('service_account.json'):
+    print("ERROR: service_account.json not found!")
+    exit()
+
+try:
+    gc = gspread.service_account(filename='service_account.json')
+    try:
+        sh = gc.open("database_sirumat")
+    except gspread.SpreadsheetNotFound:
+        sh = gc.open("Database_SiRumat")
+
+    print(f"Connected to: {sh.title}")
+
+    layout = ensure_formulas(sh, skip=(META_SHEET,))
+    # Level 1: row count and total checksum of every worksheet, one read
+    summaries = read_summaries(sh)
+    versions, _ = read_versions(sh)
+
+    for sheet_name, (meta_row, n_cols) in layout.items():
+        df, _ = shared_cache.peek(sheet_name)
+        if df is None:
+            print(f"{sheet_name}: no local snapshot, skipped.")
+            continue
+
+        blocks = local_blocks(df, n_cols)
+        if summaries.get(sheet_name) == local_summary(df, blocks):
+            print(f"{sheet_name}: OK ({len(df)} rows).")
+            continue
+
+        # Level 2: per-block checksums of this worksheet only
+        remote = read_blocks(sh, meta_row)
+        differing = diff_blocks(blocks, remote)
+        if not differing:
+            print(f"{sheet_name}: OK ({len(df)} rows, totals still recalculating).")
+            continue
+
+        versi = versions["*"] if "*" in versions else versions.get(sheet_name, "")
+        repaired, changed_rows, full_reload = repair(sh, sheet_name, df, n_cols, remote, differing)
+        if full_reload:
+            print(f"{sheet_name}: {len(differing)} of {len(remote)} blocks differ, reloaded in full.")
+        else:
+            print(f"{sheet_name}: repaired blocks {', '.join(str(b + 1) for b in differing)} "
+                  f"of {len(remote)} ({len(df)} -> {len(repaired)} rows).")
+
+        repaired = shared_cache.put_sheet(sheet_name, repaired, versi)
+        apply_to_local_state(sheet_name, changed_rows, whole_sheet=full_reload)
+
+        still_differing = diff_blocks(local_blocks(repaired, n_cols), remote)
+        if still_differing:
+            # Usually number formats (e.g. "1,000") that read back differently than Sheets stores them
+            print(f"WARNING: {sheet_name} blocks {', '.join(str(b + 1) for b in still_differing)} still differ after repair.")
+
+    print("\nReconcile Complete!")
+
+except Exception as e:
+    print(f"CRITICAL ERROR: {e}")
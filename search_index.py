@@ -0,0 +1,223 @@
+import hashlib
+import json
+import re
+
+from local_store import connect
+
+# Free-text fields per worksheet, mapped to the index columns (teks, lokasi, nama)
+SEARCH_FIELDS = {
+    "Laporan_Kerusakan": ("Kendala", "Lokasi", "Nama Pelapor"),
+    "Laporan_Perbaikan": ("Tindakan Perbaikan", "Lokasi", "Nama Teknisi"),
+}
+
+# Fields that identify a row, so a re-synced row updates its document instead of duplicating it.
+# Old ticket IDs only have second resolution and can repeat, so they never identify a row alone.
+KEY_FIELDS = {
+    "Laporan_Kerusakan": ("Tanggal", "Nama Pelapor", "Tiket ID"),
+    "Laporan_Perbaikan": ("Tanggal", "Nama Teknisi", "Tiket ID"),
+}
+
+# bm25 weights for (teks, lokasi, nama): a hit on location or name ranks above one in the description
+RANK_WEIGHTS = (1.0, 2.0, 2.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dokumen (
+    id INTEGER PRIMARY KEY,
+    sheet TEXT NOT NULL,
+    doc_key TEXT NOT NULL,
+    row_hash TEXT NOT NULL,
+    tanggal TEXT,
+    status TEXT,
+    lokasi TEXT,
+    data TEXT NOT NULL,
+    arsip INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (sheet, doc_key)
+);
+CREATE INDEX IF NOT EXISTS idx_dokumen_tanggal ON dokumen (sheet, tanggal);
+CREATE INDEX IF NOT EXISTS idx_dokumen_status ON dokumen (sheet, status, tanggal);
+CREATE INDEX IF NOT EXISTS idx_dokumen_lokasi ON dokumen (sheet, lokasi, tanggal);
+CREATE VIRTUAL TABLE IF NOT EXISTS dokumen_fts USING fts5 (
+    teks, lokasi, nama, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+def open_index():
+    conn = connect()
+    conn.executescript(SCHEMA)
+    return conn
+
+def _clean(record):
+    # Sheets returns a mix of int and str; index everything as text so hashes are stable
+    return {k: "" if v is None else str(v) for k, v in record.items()}
+
+def _doc_key(sheet_name, record):
+    key = "|".join(record.get(f, "") for f in KEY_FIELDS[sheet_name])
+    # Old rows without a ticket ID (or name) fall back to their full content
+    identity = "|".join(record.get(f, "") for f in KEY_FIELDS[sheet_name] if f != "Tanggal")
+    if not identity.strip("|-"):
+        key = json.dumps(record, sort_keys=True)
+    return key
+
+def index_records(sheet_name, records, archived=False, prune=False):
+    """Adds or refreshes documents for the given rows. Returns the number of changed documents.
+
+    Unchanged rows cost one primary-key lookup, so calling this with the whole
+    hot worksheet on every rerun only writes the rows that were appended or edited.
+    archived=True marks rows read from (or moved to) the Parquet archive; a
+    document stays archived once it is. prune=True says records are the whole
+    hot worksheet: hot documents missing from it (deleted rows, or rows whose
+    key fields were edited) are removed.
+    """
+    if sheet_name not in SEARCH_FIELDS:
+        return 0
+
+    teks_col, lokasi_col, nama_col = SEARCH_FIELDS[sheet_name]
+    arsip = int(archived)
+    changed = 0
+    seen = set()
+    conn = open_index()
+    try:
+        with conn:
+            for raw in records:
+                record = _clean(raw)
+                doc_key = _doc_key(sheet_name, record)
+                seen.add(doc_key)
+                data = json.dumps(record, ensure_ascii=False)
+                row_hash = hashlib.sha1(data.encode()).hexdigest()
+
+                existing = conn.execute(
+                    "SELECT id, row_hash, arsip FROM dokumen WHERE sheet = ? AND doc_key = ?",
+                    (sheet_name, doc_key)
+                ).fetchone()
+                if existing and existing[1] == row_hash and existing[2] >= arsip:
+                    continue
+
+                values = (
+                    row_hash, record.get("Tanggal", ""), record.get("Status", ""),
+                    record.get(lokasi_col, ""), data
+                )
+                if existing:
+                    doc_id = existing[0]
+                    conn.execute(
+                        "UPDATE dokumen SET row_hash = ?, tanggal = ?, status = ?, lokasi = ?, data = ?, "
+                        "arsip = MAX(arsip, ?) WHERE id = ?",
+                        values + (arsip, doc_id)
+                    )
+                    conn.execute("DELETE FROM dokumen_fts WHERE rowid = ?", (doc_id,))
+                else:
+                    doc_id = conn.execute(
+                        "INSERT INTO dokumen (sheet, doc_key, row_hash, tanggal, status, lokasi, data, arsip) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (sheet_name, doc_key) + values + (arsip,)
+                    ).lastrowid
+                conn.execute(
+                    "INSERT INTO dokumen_fts (rowid, teks, lokasi, nama) VALUES (?, ?, ?, ?)",
+                    (doc_id, record.get(teks_col, ""), record.get(lokasi_col, ""), record.get(nama_col, ""))
+                )
+                changed += 1
+
+            # An empty list is more likely a failed read than an emptied worksheet; never prune on it
+            if prune and not archived and seen:
+                hot = conn.execute(
+                    "SELECT id, doc_key FROM dokumen WHERE sheet = ? AND arsip = 0", (sheet_name,)
+                ).fetchall()
+                for doc_id, doc_key in hot:
+                    if doc_key not in seen:
+                        conn.execute("DELETE FROM dokumen WHERE id = ?", (doc_id,))
+                        conn.execute("DELETE FROM dokumen_fts WHERE rowid = ?", (doc_id,))
+                        changed += 1
+    finally:
+        conn.close()
+    return changed
+
+def build_match_query(text):
+    """Turns user input into an FTS5 query: every word must match, as a prefix."""
+    words = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{w}"*' for w in words)
+
+def search(text, sheet_name=None, page=1, page_size=10):
+    """Returns (total_hits, results) for one page, best matches first.
+
+    Each result is a dict with the sheet name, the original row and a highlighted snippet.
+    """
+    match = build_match_query(text)
+    if not match:
+        return 0, []
+
+    where = "dokumen_fts MATCH ?"
+    params = [match]
+    if sheet_name:
+        where += " AND d.sheet = ?"
+        params.append(sheet_name)
+
+    conn = open_index()
+    try:
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM dokumen_fts JOIN dokumen d ON d.id = dokumen_fts.rowid WHERE {where}",
+            params
+        ).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT d.sheet, d.data, snippet(dokumen_fts, 0, '**', '**', '…', 16) "
+            f"FROM dokumen_fts JOIN dokumen d ON d.id = dokumen_fts.rowid WHERE {where} "
+            f"ORDER BY bm25(dokumen_fts, {', '.join(map(str, RANK_WEIGHTS))}) LIMIT ? OFFSET ?",
+            params + [page_size, (page - 1) * page_size]
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return total, [
+        {"sheet": sheet, "data": json.loads(data), "snippet": snippet}
+        for sheet, data, snippet in rows
+    ]
+
+def _row_filters(sheet_name, start, end, status, lokasi):
+    where = ["sheet = ?"]
+    params = [sheet_name]
+    if start:
+        where.append("tanggal >= ?")
+        params.append(str(start))
+    if end:
+        # Dates are stored as text, so include the whole end day
+        where.append("tanggal <= ?")
+        params.append(f"{end} 23:59:59")
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if lokasi:
+        where.append("lokasi = ?")
+        params.append(lokasi)
+    return " AND ".join(where), params
+
+def query_rows(sheet_name, start=None, end=None, status=None, lokasi=None, page=1, page_size=25):
+    """Returns (total_rows, rows) for one page of a sheet's history, newest first.
+
+    Filtering, counting and paging all run on the local index; only the rows of
+    the requested page are decoded. Pass page_size=None to get every matching row.
+    """
+    where, params = _row_filters(sheet_name, start, end, status, lokasi)
+    conn = open_index()
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM dokumen WHERE {where}", params).fetchone()[0]
+        sql = f"SELECT data FROM dokumen WHERE {where} ORDER BY tanggal DESC, id DESC"
+        if page_size is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [page_size, (page - 1) * page_size]
+        rows = [json.loads(data) for (data,) in conn.execute(sql, params)]
+    finally:
+        conn.close()
+    return total, rows
+
+def distinct_values(sheet_name, column):
+    """Lists the distinct values of an indexed filter column ('status' or 'lokasi')."""
+    if column not in ("status", "lokasi"):
+        raise ValueError(f"Kolom filter tidak dikenal: {column}")
+    conn = open_index()
+    try:
+        return [
+            value for (value,) in conn.execute(
+                f"SELECT DISTINCT {column} FROM dokumen WHERE sheet = ? AND {column} != '' ORDER BY {column}",
+                (sheet_name,)
+            )
+        ]
+    finally:
+        conn.close()
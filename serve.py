@@ -0,0 +1,16 @@
+import sys
+
+# Deploy entrypoint, instead of `streamlit run main.py`:
+#     python warmup.py && python serve.py [streamlit run options, e.g. --server.port 8501]
+# warmup.py fills the snapshot cache shared by all processes on the host. This
+# script then starts authenticating and opening the spreadsheet inside the server
+# process itself before Streamlit accepts connections, so the first visitor of a
+# fresh process no longer waits for it (main.py picks up the same background open).
+import sheets_client
+
+sheets_client.open_in_background(sheets_client.secrets_service_account())
+
+from streamlit.web import cli as stcli
+
+sys.argv = ["streamlit", "run", "main.py"] + sys.argv[1:]
+sys.exit(stcli.main())
@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+
+from local_store import LOCAL_DIR, connect
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, every process may refresh on its own
+    fcntl = None
+
+# Sheet snapshots shared by every Streamlit process on this host, as Arrow IPC files
+CACHE_DIR = os.path.join(LOCAL_DIR, "cache")
+
+# Snapshots older than this are refreshed even without a write from the app
+# (catches edits made directly in Google Sheets)
+SNAPSHOT_TTL = 60
+
+# With a version token from sheet_versions the snapshot is trusted much longer;
+# the TTL is only a safety net for edits that bypass the app
+VERSIONED_TTL = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_generasi (
+    sheet TEXT PRIMARY KEY,
+    generasi INTEGER NOT NULL
+);
+"""
+
+# Per-process copy of the last decoded snapshot: {sheet: (snapshot key, DataFrame)}
+_memo = {}
+_memo_lock = threading.Lock()
+
+def _snapshot_path(sheet_name):
+    return os.path.join(CACHE_DIR, f"{sheet_name}.arrow")
+
+def current_generation(sheet_name):
+    conn = connect()
+    try:
+        conn.executescript(SCHEMA)
+        row = conn.execute("SELECT generasi FROM cache_generasi WHERE sheet = ?", (sheet_name,)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else 0
+
+def invalidate(sheet_name):
+    """Marks every process's snapshot of a sheet stale. Call after any write to the sheet."""
+    conn = connect()
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute(
+                "INSERT INTO cache_generasi (sheet, generasi) VALUES (?, 1) "
+                "ON CONFLICT (sheet) DO UPDATE SET generasi = generasi + 1",
+                (sheet_name,)
+            )
+    finally:
+        conn.close()
+    with _memo_lock:
+        _memo.pop(sheet_name, None)
+
+def _read_snapshot(sheet_name, generation, ttl, version):
+    """Returns the snapshot DataFrame if it is still valid, else None."""
+    import pyarrow as pa
+
+    path = _snapshot_path(sheet_name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    if version is not None:
+        ttl = VERSIONED_TTL
+
+    key = (stat.st_mtime_ns, stat.st_size, generation, version)
+    with _memo_lock:
+        memo = _memo.get(sheet_name)
+    if memo and memo[0] == key and time.time() - stat.st_mtime < ttl:
+        return memo[1]
+
+    # Memory-mapped: the schema metadata is checked before any column is touched
+    reader = pa.ipc.open_file(pa.memory_map(path))
+    meta = reader.schema.metadata or {}
+    if int(meta.get(b"generasi", -1)) != generation:
+        return None
+    if version is not None and meta.get(b"versi", b"").decode() != version:
+        return None
+    if time.time() - float(meta.get(b"dibuat", 0)) >= ttl:
+        return None
+
+    df = reader.read_all().to_pandas()
+    with _memo_lock:
+        _memo[sheet_name] = (key, df)
+    return df
+
+def _write_snapshot(sheet_name, df, generation, version):
+    import pyarrow as pa
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df = df.copy()
+    # get_all_records mixes int and str in one column, which Arrow cannot store
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype(str)
+
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata({
+        "generasi": str(generation),
+        "versi": version or "",
+        "dibuat": str(time.time()),
+    })
+    path = _snapshot_path(sheet_name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    # Readers either see the old file or the new one, never a partial write
+    os.replace(tmp_path, path)
+    return df
+
+def get_sheet(sheet_name, loader, ttl=SNAPSHOT_TTL, version=None):
+    """Returns a sheet's rows from the shared snapshot, calling loader() only when it is stale.
+
+    loader() fetches the sheet and returns a DataFrame, or None when the data is
+    unavailable (None is returned as-is and not cached). When a version token is
+    given (see sheet_versions), the snapshot stays valid until the token changes.
+    When several processes find the snapshot stale at once, a file lock lets one
+    of them reload while the others wait and then read its snapshot, so one
+    change costs one Sheets read.
+    """
+    generation = current_generation(sheet_name)
+    df = _read_snapshot(sheet_name, generation, ttl, version)
+    if df is not None:
+        # Callers add columns in place; keep the shared copy pristine
+        return df.copy()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, f"{sheet_name}.lock"), "w") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            # Another process may have refreshed the snapshot while we waited
+            generation = current_generation(sheet_name)
+            df = _read_snapshot(sheet_name, generation, ttl, version)
+            if df is not None:
+                return df.copy()
+
+            df = loader()
+            if df is None:
+                return None
+            return _write_snapshot(sheet_name, df, generation, version)
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def peek(sheet_name):
+    """Returns (DataFrame, version token) of the stored snapshot whatever its age, or (None, None)."""
+    import pyarrow as pa
+
+    path = _snapshot_path(sheet_name)
+    if not os.path.exists(path):
+        return None, None
+    reader = pa.ipc.open_file(pa.memory_map(path))
+    meta = reader.schema.metadata or {}
+    return reader.read_all().to_pandas(), meta.get(b"versi", b"").decode() or None
+
+def put_sheet(sheet_name, df, version=None):
+    """Replaces a sheet's snapshot with rows the caller already holds (e.g. after a repair)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, f"{sheet_name}.lock"), "w") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            df = _write_snapshot(sheet_name, df, current_generation(sheet_name), version)
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    with _memo_lock:
+        _memo.pop(sheet_name, None)
+    return df
@@ -0,0 +1,93 @@
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# One row per worksheet: Sheet | Versi | Diubah. The app writes a fresh token on every write.
+META_SHEET = "Meta_Versi"
+META_HEADERS = ["Sheet", "Versi", "Diubah"]
+
+# Reruns within this many seconds reuse the last probe instead of calling the API again
+PROBE_INTERVAL = 5
+
+_probe = {"waktu": 0.0, "versi": {}, "baris": {}}
+_probe_lock = threading.Lock()
+
+def new_token():
+    # Unique rather than incrementing: concurrent writers cannot end up on the same value
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+def read_versions(sh):
+    """Reads every worksheet's version token in one API call.
+
+    Returns ({sheet: token}, {sheet: meta row number}). Without a Meta_Versi
+    worksheet, the Drive modifiedTime of the whole spreadsheet is used as the
+    token for every sheet (coarser, but still one cheap call).
+    """
+    import gspread
+
+    try:
+        values = sh.values_get(f"{META_SHEET}!A2:B").get("values", [])
+    except gspread.exceptions.APIError:
+        modified = sh.get_lastUpdateTime() if hasattr(sh, "get_lastUpdateTime") else sh.lastUpdateTime
+        return {"*": f"drive:{modified}"}, {}
+
+    versions, rows = {}, {}
+    for i, row in enumerate(values, start=2):
+        if row and row[0]:
+            versions[row[0]] = row[1] if len(row) > 1 else ""
+            rows[row[0]] = i
+    return versions, rows
+
+def refresh_probe(sh):
+    """Reads the version tokens now and keeps them for the next PROBE_INTERVAL seconds. Returns {sheet: token}."""
+    versions, rows = read_versions(sh)
+    with _probe_lock:
+        _probe.update(waktu=time.time(), versi=versions, baris=rows)
+    return versions
+
+def sheet_version(sheet_name, get_spreadsheet):
+    """Returns the current version token of a worksheet, or None when it cannot be probed.
+
+    get_spreadsheet is only called when the last probe is older than PROBE_INTERVAL.
+    """
+    with _probe_lock:
+        fresh = time.time() - _probe["waktu"] < PROBE_INTERVAL
+        versions = _probe["versi"]
+    if not fresh:
+        sh = get_spreadsheet()
+        if sh is None:
+            return None
+        versions = refresh_probe(sh)
+
+    if "*" in versions:
+        return versions["*"]
+    # A sheet the app has never written to has no row yet; "" is still a stable token
+    return versions.get(sheet_name, "")
+
+def bump_version(sh, sheet_name):
+    """Records that a worksheet changed. Call after the rows themselves are written."""
+    import gspread
+
+    token = new_token()
+    try:
+        ws = sh.worksheet(META_SHEET)
+    except gspread.WorksheetNotFound:
+        # No meta sheet: the Drive modifiedTime fallback already reflects the write
+        return None
+
+    with _probe_lock:
+        row = _probe["baris"].get(sheet_name)
+    if row is None:
+        _, rows = read_versions(sh)
+        row = rows.get(sheet_name)
+
+    waktu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if row is None:
+        ws.append_row([sheet_name, token, waktu])
+    else:
+        ws.update([[token, waktu]], f"B{row}:C{row}")
+
+    with _probe_lock:
+        _probe["versi"] = {**_probe["versi"], sheet_name: token}
+    return token
@@ -0,0 +1,98 @@
+import os
+import threading
+
+from local_store import get_setting, set_setting
+
+# gspread and the Google auth stack are imported inside the functions: they take
+# a noticeable part of a cold start and are not needed to render cached data.
+
+SPREADSHEET_NAMES = ("database_sirumat", "Database_SiRumat")
+
+# Background open of this process: {"thread", "spreadsheet", "galat"}
+_background = {"thread": None, "spreadsheet": None, "galat": None}
+_background_lock = threading.Lock()
+
+def secrets_service_account():
+    """The service account from Streamlit secrets (Streamlit Cloud), or None to use service_account.json."""
+    import streamlit as st
+
+    try:
+        if "gcp_service_account" in st.secrets:
+            return st.secrets["gcp_service_account"]
+    except FileNotFoundError:
+        pass
+    return None
+
+def open_spreadsheet(service_account_info=None):
+    """Authenticates and opens the Si-Rumat spreadsheet.
+
+    The spreadsheet key is remembered locally after the first open by name, so
+    later starts skip the Drive search and open it directly by key.
+    """
+    import gspread
+
+    if service_account_info:
+        gc = gspread.service_account_from_dict(dict(service_account_info))
+    elif os.path.exists('service_account.json'):
+        gc = gspread.service_account(filename='service_account.json')
+    else:
+        raise FileNotFoundError("Missing Google Sheets credentials. Please configure secrets or add service_account.json.")
+
+    key = get_setting("spreadsheet_id")
+    if key:
+        try:
+            return gc.open_by_key(key)
+        except (gspread.SpreadsheetNotFound, gspread.exceptions.APIError):
+            pass
+
+    try:
+        sh = gc.open(SPREADSHEET_NAMES[0])
+    except gspread.SpreadsheetNotFound:
+        sh = gc.open(SPREADSHEET_NAMES[1])
+    set_setting("spreadsheet_id", sh.id)
+    return sh
+
+def _open_and_probe(service_account_info):
+    import sheet_versions
+
+    try:
+        sh = open_spreadsheet(service_account_info)
+        # The first load_data of the process then finds fresh version tokens too
+        sheet_versions.refresh_probe(sh)
+        _background["spreadsheet"] = sh
+    except Exception as e:
+        _background["galat"] = e
+
+def open_in_background(service_account_info=None):
+    """Starts authenticating, opening and probing the spreadsheet in a daemon thread, once per process.
+
+    Returns at once; background_spreadsheet() waits for the result.
+    """
+    with _background_lock:
+        if _background["thread"] is None:
+            _background["thread"] = threading.Thread(
+                target=_open_and_probe, args=(service_account_info,), name="sheets-open", daemon=True
+            )
+            _background["thread"].start()
+
+def background_spreadsheet(timeout=60):
+    """The spreadsheet opened by open_in_background(), or None if it was not started or failed.
+
+    Callers fall back to open_spreadsheet(), which raises the error to show.
+    """
+    thread = _background["thread"]
+    if thread is None:
+        return None
+    thread.join(timeout)
+    return _background["spreadsheet"]
+
+def fetch_records(sh, sheet_name):
+    """Downloads a worksheet as a DataFrame; a missing worksheet gives an empty one."""
+    import gspread
+    import pandas as pd
+
+    try:
+        worksheet = sh.worksheet(sheet_name)
+    except gspread.WorksheetNotFound:
+        return pd.DataFrame()
+    return pd.DataFrame(worksheet.get_all_records())
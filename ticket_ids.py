@@ -0,0 +1,70 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+# Tiket ID layout: TKT-<YYYYMMDDHHMMSS><ms>-<node>-<seq>, e.g. TKT-20251124023413123-3f9a0c-0001
+# The timestamp comes first so IDs sort by creation time; node and sequence make them unique.
+SEQ_DIGITS = 4
+MAX_SEQ = 10 ** SEQ_DIGITS - 1
+
+# The layout before this one, TKT-<YYYYMMDDHHMMSS>, repeats for reports made in the same second
+LEGACY_ID = re.compile(r"TKT-\d{14}")
+
+def is_legacy_id(tiket_id):
+    return bool(LEGACY_ID.fullmatch(tiket_id))
+
+def node_id():
+    """Identifies this process: SIRUMAT_NODE_ID if set, else 24 random bits.
+
+    Random rather than derived from hostname/pid so two containers with the same
+    hostname and pid (common with identical replicas) still get different nodes.
+    """
+    return os.environ.get("SIRUMAT_NODE_ID") or os.urandom(3).hex()
+
+class TicketIdAllocator:
+    """Thread-safe, monotonic ticket ID source. No round-trip to Sheets is needed.
+
+    Within one millisecond up to 10,000 IDs get increasing sequence numbers.
+    Beyond that, or if the clock steps back, the allocator keeps counting on
+    the last timestamp it issued instead of sleeping, so IDs never repeat or go
+    backwards inside a process.
+    """
+
+    def __init__(self, node=None, clock=time.time):
+        self.node = node or node_id()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._seq = 0
+
+    def next_id(self):
+        with self._lock:
+            now_ms = int(self._clock() * 1000)
+            if now_ms <= self._last_ms:
+                now_ms = self._last_ms
+                self._seq += 1
+                if self._seq > MAX_SEQ:
+                    now_ms += 1
+                    self._seq = 0
+            else:
+                self._seq = 0
+            self._last_ms = now_ms
+            seq = self._seq
+
+        stamp = datetime.fromtimestamp(now_ms / 1000).strftime("%Y%m%d%H%M%S")
+        return f"TKT-{stamp}{now_ms % 1000:03d}-{self.node}-{seq:0{SEQ_DIGITS}d}"
+
+_allocator = TicketIdAllocator()
+
+def _reset_after_fork():
+    # A forked worker must not share the parent's node and sequence
+    global _allocator
+    _allocator = TicketIdAllocator()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def next_ticket_id():
+    return _allocator.next_id()
@@ -0,0 +1,214 @@
+from datetime import datetime
+
+import pandas as pd
+
+from local_store import connect, get_setting, set_setting, write_transaction
+from search_index import KEY_FIELDS
+from ticket_ids import is_legacy_id
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Open-ticket age buckets (upper bound in days, label)
+AGE_BUCKETS = [(1, "< 1 hari"), (3, "1-3 hari"), (7, "3-7 hari"), (30, "7-30 hari"), (None, "> 30 hari")]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiket (
+    kunci TEXT PRIMARY KEY,
+    tiket_id TEXT NOT NULL,
+    lokasi TEXT NOT NULL DEFAULT '',
+    dibuka TEXT,
+    ditutup TEXT,
+    status TEXT NOT NULL DEFAULT 'Pending'
+);
+CREATE INDEX IF NOT EXISTS idx_tiket_status ON tiket (status, dibuka);
+CREATE INDEX IF NOT EXISTS idx_tiket_id ON tiket (tiket_id, dibuka);
+CREATE TABLE IF NOT EXISTS statistik_lokasi (
+    lokasi TEXT PRIMARY KEY,
+    terbuka INTEGER NOT NULL DEFAULT 0,
+    selesai_terukur INTEGER NOT NULL DEFAULT 0,
+    total_detik REAL NOT NULL DEFAULT 0
+);
+"""
+
+# Set once the archived tickets were applied (fresh installs backfill from the archive once)
+BACKFILL_KEY = "lifecycle_arsip_terisi"
+
+# Fingerprint of the last frames synced by this process, so an unchanged rerun costs one hash
+_last_synced = {}
+
+def open_lifecycle():
+    # Autocommit: every update runs in its own write_transaction()
+    conn = connect(autocommit=True)
+    conn.executescript(SCHEMA)
+    return conn
+
+def _parse(value):
+    try:
+        return datetime.strptime(str(value), DATE_FORMAT)
+    except ValueError:
+        return None
+
+def _contribution(status, dibuka, ditutup):
+    """What one ticket adds to its location's counters: (open, measured repairs, repair seconds)."""
+    terbuka = 0 if status == "Selesai" else 1
+    start, end = _parse(dibuka), _parse(ditutup)
+    if start and end:
+        return terbuka, 1, max(0.0, (end - start).total_seconds())
+    return terbuka, 0, 0.0
+
+def _add_stats(conn, lokasi, contribution, sign):
+    terbuka, terukur, detik = contribution
+    conn.execute(
+        "INSERT INTO statistik_lokasi (lokasi, terbuka, selesai_terukur, total_detik) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (lokasi) DO UPDATE SET terbuka = terbuka + excluded.terbuka, "
+        "selesai_terukur = selesai_terukur + excluded.selesai_terukur, total_detik = total_detik + excluded.total_detik",
+        (lokasi, sign * terbuka, sign * terukur, sign * detik)
+    )
+
+def _upsert(conn, kunci, tiket_id, lokasi=None, dibuka=None, status=None, ditutup=None):
+    """Merges what one sheet row says about a ticket and moves the location counters by the difference.
+
+    A repair row (ditutup) closes the ticket even if its damage report still says
+    Pending, and may arrive before the report itself; the earliest repair counts.
+    """
+    old = conn.execute(
+        "SELECT lokasi, dibuka, ditutup, status FROM tiket WHERE kunci = ?", (kunci,)
+    ).fetchone()
+    old_lokasi, old_dibuka, old_ditutup, old_status = old or ("", None, None, None)
+
+    new_lokasi = lokasi or old_lokasi
+    new_dibuka = dibuka or old_dibuka
+    new_ditutup = min(d for d in (old_ditutup, ditutup) if d) if (old_ditutup or ditutup) else None
+    new_status = "Selesai" if new_ditutup else (status or old_status or "Pending")
+
+    if old and (new_lokasi, new_dibuka, new_ditutup, new_status) == tuple(old):
+        return False
+
+    if old:
+        _add_stats(conn, old_lokasi, _contribution(old_status, old_dibuka, old_ditutup), -1)
+    conn.execute(
+        "INSERT INTO tiket (kunci, tiket_id, lokasi, dibuka, ditutup, status) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (kunci) DO UPDATE SET lokasi = excluded.lokasi, dibuka = excluded.dibuka, "
+        "ditutup = excluded.ditutup, status = excluded.status",
+        (kunci, tiket_id, new_lokasi, new_dibuka, new_ditutup, new_status)
+    )
+    _add_stats(conn, new_lokasi, _contribution(new_status, new_dibuka, new_ditutup), 1)
+    return True
+
+def _is_ticket(tiket_id):
+    return bool(tiket_id) and tiket_id != "-"
+
+def _report_key(row):
+    """The ticket a damage report opens. Legacy IDs repeat, so those are keyed like the search index."""
+    tiket_id = str(row.get("Tiket ID", ""))
+    if is_legacy_id(tiket_id):
+        return "|".join(str(row.get(f, "")) for f in KEY_FIELDS["Laporan_Kerusakan"])
+    return tiket_id
+
+def _repair_key(conn, tiket_id, ditutup):
+    """The ticket a repair row closes, or None when a legacy ID has no report to close yet."""
+    if not is_legacy_id(tiket_id):
+        return tiket_id
+    # The report this repair already closed, else the earliest one with that ID still open
+    row = conn.execute(
+        "SELECT kunci FROM tiket WHERE tiket_id = ? AND ditutup = ?", (tiket_id, ditutup)
+    ).fetchone() or conn.execute(
+        "SELECT kunci FROM tiket WHERE tiket_id = ? AND ditutup IS NULL ORDER BY dibuka, kunci LIMIT 1",
+        (tiket_id,)
+    ).fetchone()
+    return row[0] if row else None
+
+def apply_rows(df_kerusakan=None, df_perbaikan=None):
+    """Applies damage reports (ticket opened) and repair reports (ticket closed). Returns changed tickets."""
+    changed = 0
+    conn = open_lifecycle()
+    try:
+        with write_transaction(conn):
+            if df_kerusakan is not None and not df_kerusakan.empty and "Tiket ID" in df_kerusakan.columns:
+                for row in df_kerusakan.to_dict("records"):
+                    tiket_id = str(row.get("Tiket ID", ""))
+                    if _is_ticket(tiket_id):
+                        changed += _upsert(
+                            conn, _report_key(row), tiket_id, lokasi=str(row.get("Lokasi", "")),
+                            dibuka=str(row.get("Tanggal", "")), status=str(row.get("Status", "")) or None
+                        )
+            if df_perbaikan is not None and not df_perbaikan.empty and "Tiket ID" in df_perbaikan.columns:
+                for row in df_perbaikan.to_dict("records"):
+                    tiket_id = str(row.get("Tiket ID", ""))
+                    ditutup = str(row.get("Tanggal", ""))
+                    kunci = _repair_key(conn, tiket_id, ditutup) if _is_ticket(tiket_id) else None
+                    if kunci:
+                        changed += _upsert(conn, kunci, tiket_id, ditutup=ditutup)
+    finally:
+        conn.close()
+    return changed
+
+def _fingerprint(df):
+    if df is None or df.empty:
+        return (0, 0)
+    return (len(df), int(pd.util.hash_pandas_object(df.astype(str), index=False).sum()))
+
+def sync(df_kerusakan, df_perbaikan, load_archived=None):
+    """Brings the ticket index up to date with the hot worksheets.
+
+    Rows are matched on Tiket ID one by one (no DataFrame merge), and a rerun
+    with unchanged sheets is skipped after hashing them. load_archived() returns
+    the archived (kerusakan, perbaikan) frames and is only called once per install.
+    """
+    if load_archived is not None and get_setting(BACKFILL_KEY) is None:
+        apply_rows(*load_archived())
+        set_setting(BACKFILL_KEY, datetime.now().strftime(DATE_FORMAT))
+
+    fingerprint = (_fingerprint(df_kerusakan), _fingerprint(df_perbaikan))
+    if _last_synced.get("hot") == fingerprint:
+        return 0
+    changed = apply_rows(df_kerusakan, df_perbaikan)
+    _last_synced["hot"] = fingerprint
+    return changed
+
+def summary():
+    """Returns (open tickets, measured repairs, mean time to repair in hours or None)."""
+    conn = open_lifecycle()
+    try:
+        terbuka, terukur, detik = conn.execute(
+            "SELECT COALESCE(SUM(terbuka), 0), COALESCE(SUM(selesai_terukur), 0), COALESCE(SUM(total_detik), 0) "
+            "FROM statistik_lokasi"
+        ).fetchone()
+    finally:
+        conn.close()
+    return terbuka, terukur, (detik / terukur / 3600 if terukur else None)
+
+def backlog_per_lokasi():
+    conn = open_lifecycle()
+    try:
+        df = pd.read_sql_query(
+            "SELECT lokasi AS Lokasi, terbuka AS 'Tiket Terbuka', selesai_terukur AS 'Selesai', "
+            "CASE WHEN selesai_terukur > 0 THEN ROUND(total_detik / selesai_terukur / 3600.0, 1) END AS 'MTTR (jam)' "
+            "FROM statistik_lokasi WHERE lokasi != '' AND (terbuka > 0 OR selesai_terukur > 0) "
+            "ORDER BY terbuka DESC, lokasi",
+            conn
+        )
+    finally:
+        conn.close()
+    return df
+
+def open_ageing(now=None):
+    """Counts open tickets per age bucket."""
+    now = now or datetime.now()
+    conn = open_lifecycle()
+    try:
+        opened = [d for (d,) in conn.execute("SELECT dibuka FROM tiket WHERE status != 'Selesai'")]
+    finally:
+        conn.close()
+
+    counts = {label: 0 for _, label in AGE_BUCKETS}
+    for dibuka in opened:
+        start = _parse(dibuka)
+        if start is None:
+            continue
+        umur = (now - start).total_seconds() / 86400
+        for batas, label in AGE_BUCKETS:
+            if batas is None or umur < batas:
+                counts[label] += 1
+                break
+    return pd.DataFrame({"Umur Tiket": list(counts), "Jumlah": list(counts.values())})
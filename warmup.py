@@ -0,0 +1,30 @@
+import time
+
+t_start = time.perf_counter()
+print("Warming up Si-Rumat caches...")
+
+try:
+    import shared_cache
+    from block_checksum import CHECKSUM_SHEET
+    import sheet_versions
+    import sheets_client
+
+    # Same credential lookup as the app: Streamlit secrets first, then service_account.json.
+    # Authenticates and records the spreadsheet key, so app processes open it by key
+    sh = sheets_client.open_spreadsheet(sheets_client.secrets_service_account())
+    print(f"Connected to: {sh.title} ({time.perf_counter() - t_start:.2f}s)")
+
+    for ws in sh.worksheets():
+        if ws.title in (sheet_versions.META_SHEET, CHECKSUM_SHEET):
+            continue
+        # Snapshots are stored with their version token, exactly as load_data() would
+        versi = sheet_versions.sheet_version(ws.title, lambda: sh)
+        df = shared_cache.get_sheet(
+            ws.title, lambda: sheets_client.fetch_records(sh, ws.title), version=versi
+        )
+        print(f"{ws.title}: {len(df)} rows cached")
+
+    print(f"Warm-up Complete! ({time.perf_counter() - t_start:.2f}s)")
+
+except Exception as e:
+    print(f"WARM-UP ERROR: {e}")